@@ -2,13 +2,18 @@
 # Creates sample intraday CSV files to test the market data processor locally
 
 import os
-import csv
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
 
-def create_sample_intraday_csv(date_str: str, output_dir: str):
-    """Create a sample intraday CSV file for testing."""
-    print(f"create_sample_intraday_data.create_sample_intraday_csv: Creating sample data for {date_str}")
+# Offsets from midnight for market hours (9:30 AM to 4:00 PM ET, every 5 minutes)
+_SESSION_OFFSETS = pd.timedelta_range('9h30min', '16h', freq='5min')
+
+def generate_sample_intraday_df(date_str: str) -> pd.DataFrame:
+    """Generate one day of sample 5-minute OHLCV bars for all tickers."""
+    print(f"create_sample_intraday_data.generate_sample_intraday_df: Creating sample data for {date_str}")
     
     # Sample data for each ticker
     tickers_data = {
@@ -20,100 +25,150 @@ def create_sample_intraday_csv(date_str: str, output_dir: str):
         'VIXM': {'base_price': 22.78, 'volatility': 0.02}
     }
     
-    # Create timestamps for market hours (9:30 AM to 4:00 PM ET, every 5 minutes)
-    base_date = datetime.strptime(date_str, '%Y-%m-%d')
-    start_time = base_date.replace(hour=9, minute=30)
-    end_time = base_date.replace(hour=16, minute=0)
-    
-    timestamps = []
-    current_time = start_time
-    while current_time <= end_time:
-        timestamps.append(current_time)
-        current_time += timedelta(minutes=5)
-    
-    # Generate sample data
-    csv_rows = []
-    csv_rows.append(['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume', 'fetched_at'])
-    
-    import random
-    random.seed(42)  # For consistent test data
-    
-    for timestamp in timestamps:
-        for symbol, data in tickers_data.items():
-            base_price = data['base_price']
-            volatility = data['volatility']
-            
-            # Create realistic OHLC data
-            price_change = random.uniform(-volatility, volatility)
-            close_price = base_price * (1 + price_change)
-            
-            # Open is close from previous period (simplified)
-            open_price = close_price * (1 + random.uniform(-volatility/2, volatility/2))
-            
-            # High/Low around the open/close range
-            high_price = max(open_price, close_price) * (1 + random.uniform(0, volatility/2))
-            low_price = min(open_price, close_price) * (1 - random.uniform(0, volatility/2))
-            
-            # Volume based on ticker (SPY much higher than others)
-            if symbol == 'SPY':
-                volume = random.randint(1000000, 3000000)
-            elif symbol in ['OKLO', 'RKLB']:
-                volume = random.randint(50000, 200000)
-            else:  # VIX products
-                volume = random.randint(100000, 500000)
-            
-            row = [
-                timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                symbol,
-                round(open_price, 2),
-                round(high_price, 2),
-                round(low_price, 2),
-                round(close_price, 2),
-                volume,
-                timestamp.strftime('%Y-%m-%dT%H:%M:%S')
-            ]
-            csv_rows.append(row)
-    
-    # Write CSV file
-    filename = f"intraday_{date_str}.csv"
+    # Market-hours timestamps for this date
+    timestamps = pd.Timestamp(date_str) + _SESSION_OFFSETS
+    n_timestamps = len(timestamps)
+    
+    # Seed from the date so each day differs but reruns (and pool workers) stay reproducible.
+    # The built-in hash() is salted per process, so derive the seed from the digits instead.
+    rng = np.random.default_rng(int(date_str.replace('-', '')))
+    
+    # Generate every row for a ticker in one vectorized pass
+    ticker_frames = []
+    for symbol, data in tickers_data.items():
+        base_price = data['base_price']
+        volatility = data['volatility']
+        
+        # Create realistic OHLC data
+        price_change = rng.uniform(-volatility, volatility, size=n_timestamps)
+        close_price = base_price * (1 + price_change)
+        
+        # Open is close from previous period (simplified)
+        open_price = close_price * (1 + rng.uniform(-volatility/2, volatility/2, size=n_timestamps))
+        
+        # High/Low around the open/close range
+        high_price = np.maximum(open_price, close_price) * (1 + rng.uniform(0, volatility/2, size=n_timestamps))
+        low_price = np.minimum(open_price, close_price) * (1 - rng.uniform(0, volatility/2, size=n_timestamps))
+        
+        # Volume based on ticker (SPY much higher than others)
+        if symbol == 'SPY':
+            volume = rng.integers(1000000, 3000000, size=n_timestamps, endpoint=True)
+        elif symbol in ['OKLO', 'RKLB']:
+            volume = rng.integers(50000, 200000, size=n_timestamps, endpoint=True)
+        else:  # VIX products
+            volume = rng.integers(100000, 500000, size=n_timestamps, endpoint=True)
+        
+        ticker_frames.append(pd.DataFrame({
+            'timestamp': timestamps,
+            'symbol': symbol,
+            'open': open_price,
+            'high': high_price,
+            'low': low_price,
+            'close': close_price,
+            'volume': volume
+        }))
+    
+    # Interleave tickers per timestamp, matching the layout of the live fetcher
+    df = pd.concat(ticker_frames, ignore_index=True).sort_values('timestamp', kind='stable')
+    
+    # Round all price columns in a single vectorized pass
+    price_columns = ['open', 'high', 'low', 'close']
+    df[price_columns] = np.round(df[price_columns].to_numpy(), 2)
+    
+    df['fetched_at'] = df['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    
+    return df
+
+def create_sample_intraday_csv(date_str: str, output_dir: str, output_format: str = 'csv'):
+    """Create a sample intraday file for testing (CSV by default, or parquet/feather)."""
+    df = generate_sample_intraday_df(date_str)
+    
+    # Write output file
+    filename = f"intraday_{date_str}.{output_format}"
     filepath = os.path.join(output_dir, filename)
     
-    with open(filepath, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerows(csv_rows)
+    # Write to a temp file and swap it in, so readers never see a half-written sample file.
+    # Sample data is throwaway, so no fsync is done before the rename.
+    tmp_filepath = filepath + '.tmp'
+    
+    if output_format == 'parquet':
+        df.to_parquet(tmp_filepath, index=False, engine='pyarrow', compression='zstd')
+    elif output_format == 'feather':
+        df.reset_index(drop=True).to_feather(tmp_filepath)
+    elif output_format == 'csv':
+        # One large buffer so the whole file goes out in a handful of write() calls
+        with open(tmp_filepath, 'w', newline='', buffering=1 << 20) as csvfile:
+            df.to_csv(csvfile, index=False, float_format='%.2f')
+    else:
+        raise ValueError(f"create_sample_intraday_data.create_sample_intraday_csv: Unsupported output format: {output_format}")
     
-    print(f"create_sample_intraday_data.create_sample_intraday_csv: Created {filepath} with {len(csv_rows)-1} data points")
+    os.replace(tmp_filepath, filepath)
+    
+    print(f"create_sample_intraday_data.create_sample_intraday_csv: Created {filepath} with {len(df)} data points")
     return filepath
 
+def write_sample_intraday_dataset(date_strs: list, frames: list, output_dir: str) -> list:
+    """Write several days of samples as one date-partitioned parquet dataset (output_dir/date=YYYY-MM-DD/)."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    
+    print(f"create_sample_intraday_data.write_sample_intraday_dataset: Writing {len(frames)} days to {output_dir}")
+    
+    combined_df = pd.concat(
+        [df.assign(date=date_str) for date_str, df in zip(date_strs, frames)],
+        ignore_index=True
+    )
+    
+    ds.write_dataset(
+        pa.Table.from_pandas(combined_df, preserve_index=False),
+        output_dir,
+        format='parquet',
+        partitioning=['date'],
+        partitioning_flavor='hive',
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='overwrite_or_ignore'
+    )
+    
+    return [os.path.join(output_dir, f"date={date_str}", 'part-0.parquet') for date_str in date_strs]
+
 def main():
     """Create sample intraday data for the last 5 trading days."""
     print("create_sample_intraday_data.main: Creating sample intraday data for testing")
     
+    # Parse command line arguments
+    import argparse
+    parser = argparse.ArgumentParser(description="Create sample intraday data files for testing")
+    parser.add_argument('--format', dest='output_format', choices=['csv', 'parquet', 'feather'], default='csv',
+                       help='Output file format (default: csv)')
+    parser.add_argument('--dataset', action='store_true',
+                       help='Write all days as one date-partitioned parquet dataset instead of per-day files')
+    args = parser.parse_args()
+    
     # Set up output directory
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__)))
     output_dir = os.path.join(project_root, 'data', 'intraday')
     os.makedirs(output_dir, exist_ok=True)
     
-    # Create data for last 5 trading days (excluding weekends)
-    end_date = datetime.now().date()
-    current_date = end_date - timedelta(days=10)  # Start 10 days back to ensure we get 5 trading days
+    # Create data for last 5 trading days (excluding weekends), oldest first
+    end_date = np.datetime64(datetime.now().date())
+    trading_days = np.busday_offset(end_date, -np.arange(5)[::-1], roll='backward')
+    date_strs = [str(day) for day in trading_days]
     
-    files_created = []
-    trading_days_created = 0
+    # Days are independent, so generate them in parallel
+    with ProcessPoolExecutor(max_workers=len(date_strs) or 1) as executor:
+        if args.dataset:
+            frames = list(executor.map(generate_sample_intraday_df, date_strs))
+        else:
+            generate_day = partial(create_sample_intraday_csv, output_dir=output_dir, output_format=args.output_format)
+            files_created = list(executor.map(generate_day, date_strs))
     
-    while trading_days_created < 5 and current_date <= end_date:
-        # Skip weekends (Saturday=5, Sunday=6)
-        if current_date.weekday() < 5:  # Monday=0 to Friday=4
-            date_str = current_date.strftime('%Y-%m-%d')
-            filepath = create_sample_intraday_csv(date_str, output_dir)
-            files_created.append(filepath)
-            trading_days_created += 1
-        
-        current_date += timedelta(days=1)
+    if args.dataset:
+        files_created = write_sample_intraday_dataset(date_strs, frames, output_dir)
     
     print(f"\ncreate_sample_intraday_data.main: ✅ Created {len(files_created)} sample files:")
     for filepath in files_created:
-        print(f"  • {os.path.basename(filepath)}")
+        print(f"  • {os.path.relpath(filepath, output_dir)}")
     
     print("\n🎉 Sample data ready! Now you can test the market data processor.")
 
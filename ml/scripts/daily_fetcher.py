@@ -4,162 +4,29 @@
 import os
 import sys
 import json
+import asyncio
+import logging
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 # Add project root to path for imports
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(PROJECT_ROOT)
 
-from ml.services.openai_client import OpenAIClient
+from ml.services.openai_client import OpenAIClient, run_async
 from ml.services.json_processor import JSONProcessor
 
-class DailyMarketFetcher:
-    """Handles daily market analysis fetching from OpenAI."""
-    
-    def __init__(self):
-        """Initialize the fetcher with required services."""
-        print("daily_fetcher.DailyMarketFetcher.__init__: Initializing daily fetcher")
-        
-        self.openai_client = OpenAIClient()
-        self.json_processor = JSONProcessor()
-        
-        # Set up paths
-        self.project_root = PROJECT_ROOT
-        self.data_raw_dir = os.path.join(self.project_root, 'data', 'raw')
-        
-        # Ensure data/raw directory exists
-        os.makedirs(self.data_raw_dir, exist_ok=True)
-        
-        print("daily_fetcher.DailyMarketFetcher.__init__: Fetcher initialized successfully")
-    
-    def build_market_analysis_prompt(self, tickers: list, date: str) -> str:
-        """Build the comprehensive market analysis prompt following v2.1 schema."""
-        print("daily_fetcher.DailyMarketFetcher.build_market_analysis_prompt: Building comprehensive analysis prompt")
-        
-        prompt = f"""
-        You are a financial market analyst. You must research ACTUAL current market data for {date} and generate a comprehensive analysis.
+try:
+    import orjson  # Optional: much faster JSON encoding
+except ImportError:
+    orjson = None
 
-        CRITICAL REQUIREMENTS:
-        1. Research REAL market data - no fake or placeholder prices
-        2. Use ACTUAL closing prices from financial data providers
-        3. Reference REAL news articles and events that happened
-        4. Provide working URLs to real sources
-        5. Calculate actual percentage changes from real data
+# JSONProcessor is stateless, so every fetcher shares one instance
+_shared_json_processor = JSONProcessor()
 
-        EXAMPLE OF REQUIRED OUTPUT FORMAT (use this EXACT structure but with real {date} data):
-        
-        {{
-            "schema_version": "2.1",
-            "date": "2025-08-29",
-            "asof": "2025-08-29T15:05:00-05:00",
-            "verdict": "Neutral",
-            "tldr": "A choppy Friday into the long weekend: SPY slipped while VIX jumped after Core PCE landed near expectations, pointing to a mild risk‑off finish. OKLO reversed Thursday's pop with a >5% pullback; RKLB eased ~1% but retained most weekly gains. For the next trading day (Tue, Sep 2), base case is range‑bound to slightly positive if headlines stay quiet—VIX spikes before long weekends often mean‑revert and breadth remains adequate.",
-            "tickers": {{
-                "OKLO": {{
-                    "close": 73.57,
-                    "pct_change": -5.55,
-                    "streak": 1,
-                    "call": "Positive",
-                    "confidence": 2,
-                    "actual_move": "Down",
-                    "correct": null,
-                    "predicted_next_day_pct": 0.7,
-                    "expected_degree": "Small",
-                    "action": "Buy",
-                    "dip_onset_prob": 35,
-                    "dip_exhaustion_prob": 55
-                }},
-                "RKLB": {{
-                    "close": 47.37,
-                    "pct_change": -1.13,
-                    "streak": 1,
-                    "call": "Neutral",
-                    "confidence": 2,
-                    "actual_move": "Down",
-                    "correct": null,
-                    "predicted_next_day_pct": 0.4,
-                    "expected_degree": "Small",
-                    "action": "Hold",
-                    "dip_onset_prob": 40,
-                    "dip_exhaustion_prob": 45
-                }}
-            }},
-            "benchmarks": {{
-                "SPY": {{ "close": 644.74, "predicted_next_day_pct": 0.2 }},
-                "VIXY": {{ "close": 34.68 }},
-                "VIXM": {{ "close": 16.28 }},
-                "VIX": 15.60
-            }},
-            "prices": {{
-                "OKLO": {{ "open": 77.67, "high": 78.50, "low": 72.78, "close": 73.57, "volume": 7783043 }},
-                "RKLB": {{ "open": 47.85, "high": 48.80, "low": 46.02, "close": 47.37, "volume": 10472026 }},
-                "SPY": {{ "open": 647.47, "high": 647.84, "low": 643.14, "close": 644.74, "volume": 43244731 }},
-                "VIXY": {{ "open": 34.51, "high": 34.71, "low": 34.34, "close": 34.68, "volume": 282816 }},
-                "VIXM": {{ "open": 16.18, "high": 16.38, "low": 16.18, "close": 16.28, "volume": 12649 }},
-                "VIX": {{ "open": 14.31, "high": 15.97, "low": 14.31, "close": 15.60 }}
-            }},
-            "macro_watch": [
-                {{ "event": "Core PCE Price Index (YoY, Jul)", "publisher": "Investing.com", "link": "https://www.investing.com/economic-calendar/core-pce-price-index-905", "next_release_hint": "Next PCE release Fri, Sep 26" }},
-                {{ "event": "Employment Situation (NFP)", "publisher": "BLS", "link": "https://www.bls.gov/schedule/news_release/empsit.htm", "next_release_hint": "Fri, Sep 5 @ 08:30 ET" }}
-            ],
-            "sources": [
-                {{
-                    "id": "px_oklo_yf_2025-08-29",
-                    "type": "price",
-                    "ticker": "OKLO",
-                    "publisher": "Yahoo Finance",
-                    "title": "Oklo Inc (OKLO) Historical Data",
-                    "url": "https://finance.yahoo.com/quote/OKLO/history/",
-                    "date_accessed": "2025-08-29",
-                    "excerpt": "Aug 29, 2025: O 77.67 H 78.50 L 72.78 C 73.57; Aug 28 close 77.89."
-                }}
-            ],
-            "labels": {{
-                "prediction_for_next_day": {{
-                    "OKLO": {{ "direction": "Up", "magnitude_bucket": "Small", "reason": "Single‑day oversold after prior rally; bounce odds improve absent new headlines." }},
-                    "RKLB": {{ "direction": "Up", "magnitude_bucket": "Small", "reason": "Constructive cadence (LC‑3 milestone) supports mild continuation despite higher VIX." }}
-                }}
-            }},
-            "totals": {{ "correct": 0, "incorrect": 0, "success_rate": 0.0 }},
-            "notes": "Regular session today; markets closed Mon (Labor Day). Technical stats to populate as a 20‑day history accrues in the tracker."
-        }}
-
-        NOW CREATE THE SAME STRUCTURE FOR {date}:
-        
-        RESEARCH STEPS YOU MUST FOLLOW:
-        1. Look up ACTUAL closing prices for OKLO, RKLB, SPY, VIX, VIXY, VIXM on {date}
-        2. Calculate REAL percentage changes from previous day
-        3. Find ACTUAL recent news about OKLO and RKLB companies
-        4. Check REAL macro economic calendar for upcoming events
-        5. Generate realistic predictions based on ACTUAL market conditions
-        
-        DATA SOURCES TO USE:
-        - Yahoo Finance: https://finance.yahoo.com/quote/[TICKER]/history/
-        - Investing.com: https://www.investing.com/economic-calendar/
-        - Company news from Business Wire, MarketWatch, Reuters
-        - Economic calendar from BLS, Fed, Commerce Dept
-        
-        DO NOT GENERATE FAKE DATA. Research actual current market information.
-        Return ONLY valid JSON in the exact schema format shown above.
-        """
-        
-        return prompt
-    
-    def fetch_daily_analysis(self, tickers: list = None, date: str = None) -> dict:
-        """Fetch daily market analysis from OpenAI with web search."""
-        print("daily_fetcher.DailyMarketFetcher.fetch_daily_analysis: Starting daily analysis fetch")
-        
-        # Default tickers if none provided
-        if tickers is None:
-            tickers = ["OKLO", "RKLB", "SPY"]
-        
-        # Use today's date if none provided
-        if date is None:
-            date = datetime.now().strftime('%Y-%m-%d')
-        
-        # Build the prompt - now much simpler since web search will get real data
-        input_text = f"""
+# Prompt template is a plain string with a single {date} placeholder (JSON braces are doubled)
+_MARKET_PROMPT_TMPL = """
         You are a financial market analyst with web search access. Research and analyze the market for {date}.
 
         CRITICAL: Use web search to get REAL current market data, not fake data.
@@ -248,18 +115,83 @@ class DailyMarketFetcher:
 
         Use web search to find all the [ACTUAL] values above. Return ONLY the JSON object.
         """
+
+@lru_cache(maxsize=32)
+def _render_prompt(template: str, date: str) -> str:
+    """Fill a prompt template for the given date (cached, since backfills revisit dates)."""
+    return template.format(date=date)
+
+class DailyMarketFetcher:
+    """Handles daily market analysis fetching from OpenAI."""
+    
+    def __init__(self, openai_client: OpenAIClient = None):
+        """Initialize the fetcher with required services; pass openai_client to share one across fetchers."""
+        print("daily_fetcher.DailyMarketFetcher.__init__: Initializing daily fetcher")
+        
+        self.openai_client = openai_client if openai_client is not None else OpenAIClient()
+        self.json_processor = _shared_json_processor
+        
+        # Set up paths
+        self.project_root = PROJECT_ROOT
+        self.data_raw_dir = Path(self.project_root) / 'data' / 'raw'
+        
+        # Ensure data/raw directory exists
+        self.data_raw_dir.mkdir(parents=True, exist_ok=True)
+        
+        print("daily_fetcher.DailyMarketFetcher.__init__: Fetcher initialized successfully")
+    
+    def build_market_analysis_prompt(self, tickers: list, date: str) -> str:
+        """Build the web-search market analysis prompt following v2.1 schema."""
+        print("daily_fetcher.DailyMarketFetcher.build_market_analysis_prompt: Building market analysis prompt")
+        
+        prompt = _render_prompt(_MARKET_PROMPT_TMPL, date)
+        
+        return prompt
+    
+    def fetch_daily_analysis(self, tickers: list = None, date: str = None) -> dict:
+        """Fetch daily market analysis from OpenAI with web search."""
+        print("daily_fetcher.DailyMarketFetcher.fetch_daily_analysis: Starting daily analysis fetch")
+        
+        # Default tickers if none provided
+        if tickers is None:
+            tickers = ["OKLO", "RKLB", "SPY"]
+        
+        # Use today's date if none provided
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        
+        # Build the prompt - now much simpler since web search will get real data
+        input_text = self.build_market_analysis_prompt(tickers, date)
         
         # Make API call with web search
         print("daily_fetcher.DailyMarketFetcher.fetch_daily_analysis: Making OpenAI Responses API call with web search")
-        raw_response = self.openai_client.responses_with_web_search(input_text)
-        
-        # Clean and parse JSON
-        print("daily_fetcher.DailyMarketFetcher.fetch_daily_analysis: Processing JSON response")
-        analysis_data = self.json_processor.clean_and_parse(raw_response)
+        # The JSON is cleaned and parsed inside the call, so only a parseable answer is ever cached
+        analysis_data = self.openai_client.responses_with_web_search(input_text, parse=self.json_processor.clean_and_parse)
         
         print("daily_fetcher.DailyMarketFetcher.fetch_daily_analysis: Daily analysis fetched successfully")
         return analysis_data
     
+    async def fetch_daily_analysis_async(self, tickers: list = None, date: str = None, semaphore: asyncio.Semaphore = None) -> dict:
+        """Async variant of fetch_daily_analysis; the optional semaphore caps concurrent API calls."""
+        print(f"daily_fetcher.DailyMarketFetcher.fetch_daily_analysis_async: Starting daily analysis fetch for {date}")
+        
+        # Use today's date if none provided
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        
+        input_text = self.build_market_analysis_prompt(tickers, date)
+        
+        # Make API call with web search
+        # (cleaned and parsed inside the call, so only a parseable answer is ever cached)
+        if semaphore is None:
+            analysis_data = await self.openai_client.responses_with_web_search_async(input_text, parse=self.json_processor.clean_and_parse)
+        else:
+            async with semaphore:
+                analysis_data = await self.openai_client.responses_with_web_search_async(input_text, parse=self.json_processor.clean_and_parse)
+        
+        print(f"daily_fetcher.DailyMarketFetcher.fetch_daily_analysis_async: Daily analysis fetched successfully for {date}")
+        return analysis_data
+    
     def save_to_raw_data(self, analysis_data: dict, date: str = None) -> str:
         """Save analysis data to the data/raw directory."""
         print("daily_fetcher.DailyMarketFetcher.save_to_raw_data: Saving analysis to raw data")
@@ -269,20 +201,28 @@ class DailyMarketFetcher:
             date = datetime.now().strftime('%Y-%m-%d')
         
         # Create filename
-        filename = f"{date}.json"
-        filepath = os.path.join(self.data_raw_dir, filename)
+        filepath = self.data_raw_dir / f"{date}.json"
         
-        # Save to file
-        with open(filepath, 'w') as f:
-            json.dump(analysis_data, f, indent=2)
+        # Save to file (orjson writes UTF-8 bytes directly; stdlib json is the fallback)
+        # A 64 KiB buffer lets json.dump's many small chunk writes coalesce into a few syscalls
+        if orjson is not None:
+            with open(filepath, 'wb', buffering=1 << 16) as f:
+                f.write(orjson.dumps(analysis_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filepath, 'w', buffering=1 << 16) as f:
+                json.dump(analysis_data, f, indent=2)
         
         print(f"daily_fetcher.DailyMarketFetcher.save_to_raw_data: Analysis saved to {filepath}")
-        return filepath
+        return str(filepath)
     
     def run_daily_fetch(self, tickers: list = None, date: str = None) -> str:
         """Complete daily fetch workflow."""
         print("daily_fetcher.DailyMarketFetcher.run_daily_fetch: Starting complete daily fetch workflow")
         
+        # Resolve the date once so the prompt and the saved filename agree even across midnight
+        if date is None:
+            date = datetime.now().strftime('%Y-%m-%d')
+        
         try:
             # Fetch analysis directly (no test connection to save costs)
             analysis_data = self.fetch_daily_analysis(tickers, date)
@@ -296,15 +236,61 @@ class DailyMarketFetcher:
         except Exception as e:
             print(f"daily_fetcher.DailyMarketFetcher.run_daily_fetch: ERROR - {str(e)}")
             raise
+    
+    def run_backfill(self, dates: list, tickers: list = None, max_concurrency: int = 5, use_batch_api: bool = False) -> list:
+        """Fetch and save analyses for several dates concurrently, or via the cheaper, slower Batch API when use_batch_api is set."""
+        if use_batch_api:
+            print(f"daily_fetcher.DailyMarketFetcher.run_backfill: Backfilling {len(dates)} dates through the Batch API")
+            
+            input_texts = [self.build_market_analysis_prompt(tickers, date) for date in dates]
+            results = self.openai_client.responses_with_web_search_batch(input_texts, parse=self.json_processor.clean_and_parse)
+        else:
+            print(f"daily_fetcher.DailyMarketFetcher.run_backfill: Backfilling {len(dates)} dates with up to {max_concurrency} concurrent requests")
+            
+            async def fetch_all():
+                semaphore = asyncio.Semaphore(max_concurrency)
+                return await asyncio.gather(
+                    *[self.fetch_daily_analysis_async(tickers, date, semaphore) for date in dates],
+                    return_exceptions=True
+                )
+            
+            results = run_async(fetch_all())
+        
+        filepaths = []
+        for date, result in zip(dates, results):
+            if isinstance(result, Exception):
+                print(f"daily_fetcher.DailyMarketFetcher.run_backfill: ERROR - {date}: {str(result)}")
+                continue
+            filepaths.append(self.save_to_raw_data(result, date))
+        
+        print(f"daily_fetcher.DailyMarketFetcher.run_backfill: Saved {len(filepaths)}/{len(dates)} dates")
+        return filepaths
 
 def main():
     """Main function to run daily fetch."""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     print(f"daily_fetcher.main: Starting daily market analysis fetch at {datetime.now()}")
     
+    # Parse command line arguments
+    import argparse
+    parser = argparse.ArgumentParser(description="Fetch daily market analysis from OpenAI")
+    parser.add_argument('--backfill', nargs='+', metavar='DATE',
+                       help='Fetch several past dates concurrently (e.g., 2025-09-15 2025-09-16)')
+    parser.add_argument('--batch-api', action='store_true',
+                       help='With --backfill: submit through the OpenAI Batch API (half price, may take up to 24h)')
+    args = parser.parse_args()
+    
     try:
         # Create fetcher
         fetcher = DailyMarketFetcher()
         
+        if args.backfill:
+            filepaths = fetcher.run_backfill(args.backfill, use_batch_api=args.batch_api)
+            print(f"daily_fetcher.main: ✅ SUCCESS - Backfilled {len(filepaths)}/{len(args.backfill)} dates")
+            if len(filepaths) < len(args.backfill):
+                sys.exit(1)
+            return
+        
         # Run daily fetch
         filepath = fetcher.run_daily_fetch()
         
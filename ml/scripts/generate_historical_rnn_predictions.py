@@ -2,72 +2,158 @@
 # Generate historical RNN predictions by progressively training on more data
 
 import os
+# Suppress TensorFlow logging; these must be set before tensorflow is imported
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+# oneDNN's LSTM kernels pay a large first-call warmup that these tiny batches never amortise
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
+
 import json
+import logging
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from sklearn.preprocessing import MinMaxScaler
 from joblib import dump
 import sys
 
-# Suppress TensorFlow logging
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+try:
+    import orjson  # Optional: much faster JSON decoding/encoding
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
 
-def parse_single_json(file_path: str) -> dict:
-    """Parse a single JSON file and extract features."""
-    print(f"generate_historical_rnn_predictions.parse_single_json: Processing {os.path.basename(file_path)}")
-    
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-        
-    row = {'date': data.get('date')}
-    
-    # Extract ticker data
-    for ticker in ['OKLO', 'RKLB']:
-        ticker_data = data.get('tickers', {}).get(ticker, {})
-        row[f'{ticker}_close'] = ticker_data.get('close')
-        row[f'{ticker}_pct_change'] = ticker_data.get('pct_change')
-        row[f'{ticker}_streak'] = ticker_data.get('streak')
-        row[f'{ticker}_confidence'] = ticker_data.get('confidence')
-        row[f'{ticker}_predicted_next_day_pct'] = ticker_data.get('predicted_next_day_pct')
-        row[f'{ticker}_dip_onset_prob'] = ticker_data.get('dip_onset_prob')
-        row[f'{ticker}_dip_exhaustion_prob'] = ticker_data.get('dip_exhaustion_prob')
+# One tiny graph at a time: spread each op across cores, but don't schedule ops in parallel
+tf.config.threading.set_intra_op_parallelism_threads(os.cpu_count())
+tf.config.threading.set_inter_op_parallelism_threads(1)
+
+# Per-date helper chatter goes through DEBUG so it costs nothing unless enabled
+logger = logging.getLogger(__name__)
+
+# Fixed feature layout; parse_single_json emits values in exactly this order
+TICKERS = ('OKLO', 'RKLB')
+TICKER_FIELDS = (
+    'close', 'pct_change', 'streak', 'confidence',
+    'predicted_next_day_pct', 'dip_onset_prob', 'dip_exhaustion_prob',
+)
+BENCHMARKS = ('SPY', 'VIXY', 'VIXM', 'VIX')
+COLUMNS = tuple(f'{ticker}_{field}' for ticker in TICKERS for field in TICKER_FIELDS) + \
+          tuple(f'{benchmark}_close' for benchmark in BENCHMARKS)
 
-    # Extract benchmarks
-    for benchmark in ['SPY', 'VIXY', 'VIXM', 'VIX']:
-        bench_data = data.get('benchmarks', {}).get(benchmark)
+def parse_single_json(file_path: str) -> tuple:
+    """Parse a single JSON file and extract features as (date, float32 row)."""
+    with open(file_path, 'rb') as f:
+        data = _json_loads(f.read())
+        
+    tickers = data.get('tickers', {})
+    benchmarks = data.get('benchmarks', {})
+    
+    # Tickers: every field for each ticker, in schema order (predicted_next_day_pct is the target)
+    values = [tickers.get(ticker, {}).get(field) for ticker in TICKERS for field in TICKER_FIELDS]
+    
+    # Benchmarks can be a number (VIX) or an object with a 'close' key
+    for benchmark in BENCHMARKS:
+        bench_data = benchmarks.get(benchmark)
         if isinstance(bench_data, dict):
-            row[f'{benchmark}_close'] = bench_data.get('close')
-        elif isinstance(bench_data, (int, float)):
-            row[f'{benchmark}_close'] = bench_data
-        else:
-            row[f'{benchmark}_close'] = None
-            
-    return row
+            bench_data = bench_data.get('close')
+        values.append(bench_data if isinstance(bench_data, (int, float)) else None)
+    
+    # None becomes NaN, filled later like any other missing value
+    return data.get('date'), np.array(values, dtype=np.float32)
 
-def prepare_data_subset(raw_files: list, raw_dir: str) -> pd.DataFrame:
-    """Prepare data from a subset of raw files."""
+def load_all_rows(raw_files: list, raw_dir: str) -> tuple:
+    """Parse every raw file exactly once into a date-indexed frame.
+    
+    Returns the frame plus, for each position i in raw_files, how many parsed
+    rows come from raw_files[:i], so callers can slice training prefixes.
+    """
+    def parse_or_none(filename):
+        try:
+            return parse_single_json(os.path.join(raw_dir, filename))
+        except Exception as e:
+            logger.warning("generate_historical_rnn_predictions.load_all_rows: Skipping %s - could not parse: %s", filename, e)
+            return None
+    
+    # File reads and JSON decoding release the GIL, so a thread pool overlaps them
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        parsed = list(executor.map(parse_or_none, raw_files))
+    
     all_rows = []
+    rows_before = []
+    
+    for row in parsed:
+        rows_before.append(len(all_rows))
+        if row is not None:
+            all_rows.append(row)
     
-    for filename in raw_files:
-        file_path = os.path.join(raw_dir, filename)
-        if os.path.exists(file_path):
-            row_data = parse_single_json(file_path)
-            all_rows.append(row_data)
+    print(f"generate_historical_rnn_predictions.load_all_rows: Parsed {len(all_rows)} of {len(raw_files)} files")
     
     if not all_rows:
         raise ValueError("No data found for the given files")
     
-    df = pd.DataFrame(all_rows)
-    df['date'] = pd.to_datetime(df['date'])
-    df.set_index('date', inplace=True)
-    df.sort_index(inplace=True)
+    # Fill a column-major float32 buffer so each feature column is contiguous
+    arr = np.empty((len(all_rows), len(COLUMNS)), dtype=np.float32, order='F')
+    for i, (_, values) in enumerate(all_rows):
+        arr[i] = values
+    dates = pd.DatetimeIndex(pd.to_datetime([date for date, _ in all_rows]), name='date')
+    df = pd.DataFrame(arr, columns=list(COLUMNS), index=dates, copy=False)
     
-    # Clean the data
+    # Forward fill only looks backwards, so doing it once here gives every
+    # prefix the same values it would get if filled on its own
     df.ffill(inplace=True)
-    df.bfill(inplace=True)
+    
+    return df, rows_before
+
+class RunningMinMax:
+    """Min-max scaler whose per-column extremes grow as the backtest adds rows.
+    
+    Equivalent to fitting MinMaxScaler on each prefix, but only the new rows
+    are scanned per date. Feed it forward-filled rows that still contain NaN:
+    the per-prefix bfill only copies values already present, and columns with
+    no values yet are zero-filled, so NaN-skipping extremes match the fit.
+    """
+    
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+        self.data_min_ = np.full(n_features, np.nan, dtype=np.float32)
+        self.data_max_ = np.full(n_features, np.nan, dtype=np.float32)
+        self.min_ = np.zeros(n_features, dtype=np.float32)
+        self.scale_ = np.ones(n_features, dtype=np.float32)
+    
+    def update(self, rows: np.ndarray):
+        """Fold new rows into the running extremes and refresh min_/scale_."""
+        if len(rows) == 0:
+            return
+        
+        # fmin/fmax ignore NaN unless both sides are NaN, without warnings
+        self.data_min_ = np.fmin(self.data_min_, np.fmin.reduce(rows, axis=0))
+        self.data_max_ = np.fmax(self.data_max_, np.fmax.reduce(rows, axis=0))
+        
+        # Columns with no values yet are all zeros after fillna(0)
+        data_min = np.nan_to_num(self.data_min_)
+        data_range = np.nan_to_num(self.data_max_) - data_min
+        # Same zero-range handling as sklearn: constant columns scale by 1
+        data_range[data_range < 10 * np.finfo(data_range.dtype).eps] = 1.0
+        
+        self.scale_ = 1.0 / data_range
+        self.min_ = -data_min * self.scale_
+    
+    def transform(self, arr: np.ndarray) -> np.ndarray:
+        """Scale arr into [0, 1] using the extremes seen so far."""
+        return arr * self.scale_ + self.min_
+
+def prepare_data_subset(full_df: pd.DataFrame, n_rows: int) -> pd.DataFrame:
+    """Prepare training data from the first n_rows of the pre-parsed frame."""
+    if n_rows == 0:
+        raise ValueError("No data found for the given files")
+    
+    # Backward fill must stay per-prefix so later days never leak into earlier rows
+    df = full_df.iloc[:n_rows].bfill()
     df.fillna(0, inplace=True)
     
     return df
@@ -83,80 +169,131 @@ def build_model(input_shape):
         Dense(1)
     ])
     
-    model.compile(optimizer='adam', loss='mean_squared_error')
+    # XLA fuses the LSTM matmuls and Adam update; input_shape stays fixed
+    # because every prefix shares the full frame's column set
+    model.compile(optimizer='adam', loss='mean_squared_error', jit_compile=True)
     return model
 
+def make_inference_fn(model, timesteps: int, n_features: int):
+    """Wrap the model once in an XLA-compiled forward pass for single windows.
+    
+    The fixed input signature means the function traces once per model
+    rather than once per call.
+    """
+    @tf.function(jit_compile=True, input_signature=[tf.TensorSpec([1, timesteps, n_features], tf.float32)])
+    def infer(x):
+        return model(x, training=False)
+    
+    return infer
+
 def create_sequences(data, timesteps=3):
     """Create sequences for RNN training."""
     if len(data) < timesteps + 1:
         raise ValueError(f"Not enough data points. Need at least {timesteps + 1}, got {len(data)}")
     
-    X, y = [], []
-    for i in range(len(data) - timesteps):
-        X.append(data[i:(i + timesteps)])
-        y.append(data[i + timesteps])
+    # Zero-copy windows over the rows; drop the last one, which has no next-day target.
+    # One contiguous float32 copy is all Keras needs - no list growth, no later downcast.
+    windows = sliding_window_view(data, (timesteps, data.shape[1]))[:-1, 0]
+    X = np.ascontiguousarray(windows, dtype=np.float32)
+    y = np.ascontiguousarray(data[timesteps:], dtype=np.float32)
     
-    return np.array(X), np.array(y)
+    return X, y
 
-def train_and_predict(df: pd.DataFrame, target_ticker: str, prediction_date: str):
-    """Train model on the dataframe and make prediction."""
-    print(f"generate_historical_rnn_predictions.train_and_predict: Training {target_ticker} model for {prediction_date}")
+def train_and_predict(df: pd.DataFrame, target_ticker: str, prediction_date: str, state: dict = None,
+                      scaler: RunningMinMax = None):
+    """Train model on the dataframe and make prediction.
+    
+    If state (a per-ticker dict kept across dates) already holds a model for
+    the same feature columns, it is warm-started on just the sequences that
+    became available since the previous call instead of being rebuilt.
+    A RunningMinMax already updated with df's rows replaces refitting a
+    MinMaxScaler on the whole prefix.
+    """
+    logger.debug("generate_historical_rnn_predictions.train_and_predict: Training %s model for %s", target_ticker, prediction_date)
     
     TIMESTEPS = 3
     TARGET_FEATURE = 'predicted_next_day_pct'
+    INCREMENTAL_EPOCHS = 2
+    
+    if state is None:
+        state = {}
     
     # Prepare target column
     target_column_name = f'{target_ticker}_{TARGET_FEATURE}'
     if target_column_name not in df.columns:
-        print(f"generate_historical_rnn_predictions.train_and_predict: Warning - {target_column_name} not found, using 0")
-        df[target_column_name] = 0
+        logger.warning("generate_historical_rnn_predictions.train_and_predict: Warning - %s not found, using 0", target_column_name)
+        df[target_column_name] = np.float32(0)
     
-    # Scale the data
-    scaler = MinMaxScaler()
-    scaled_data = scaler.fit_transform(df)
+    # Scale the data (float32 in, float32 out - Keras would downcast anyway)
+    data = df.to_numpy(dtype=np.float32, copy=False)
+    if scaler is not None and scaler.n_features == data.shape[1]:
+        scaled_data = scaler.transform(data)
+    else:
+        scaler = MinMaxScaler()
+        scaled_data = scaler.fit_transform(data)
     
     # Create sequences
     try:
         X, y = create_sequences(scaled_data, TIMESTEPS)
-        print(f"generate_historical_rnn_predictions.train_and_predict: Created {len(X)} sequences of shape {X[0].shape}")
+        logger.debug("generate_historical_rnn_predictions.train_and_predict: Created %s sequences of shape %s", len(X), X[0].shape)
     except ValueError as e:
-        print(f"generate_historical_rnn_predictions.train_and_predict: {str(e)}")
+        logger.warning("generate_historical_rnn_predictions.train_and_predict: %s", e)
         return None
     
-    # Build and train model
-    model = build_model((TIMESTEPS, scaled_data.shape[1]))
+    columns = list(df.columns)
+    model = state.get('model')
     
-    # Split data (use last 20% for validation if we have enough data)
-    if len(X) >= 5:  # Need at least 5 sequences to have validation
-        split_idx = int(len(X) * 0.8)
-        X_train, X_val = X[:split_idx], X[split_idx:]
-        y_train, y_val = y[:split_idx], y[split_idx:]
-        validation_data = (X_val, y_val)
+    if model is not None and state.get('columns') == columns:
+        # Warm start: only fit the sequences added since the last date
+        seen = state['n_sequences']
+        if len(X) > seen:
+            model.fit(
+                X[seen:], y[seen:],
+                epochs=INCREMENTAL_EPOCHS,
+                batch_size=2,
+                verbose=0
+            )
     else:
-        X_train, y_train = X, y
-        validation_data = None
-    
-    # Train model (fewer epochs for speed in historical generation)
-    model.fit(
-        X_train, y_train,
-        epochs=25,  # Reduced from 50 for faster historical generation
-        batch_size=2,
-        validation_data=validation_data,
-        verbose=0  # Silent training
-    )
+        # Build and train model
+        model = build_model((TIMESTEPS, scaled_data.shape[1]))
+        
+        # Split data (use last 20% for validation if we have enough data)
+        if len(X) >= 5:  # Need at least 5 sequences to have validation
+            split_idx = int(len(X) * 0.8)
+            X_train, X_val = X[:split_idx], X[split_idx:]
+            y_train, y_val = y[:split_idx], y[split_idx:]
+            validation_data = (X_val, y_val)
+        else:
+            X_train, y_train = X, y
+            validation_data = None
+        
+        # Train model (fewer epochs for speed in historical generation)
+        model.fit(
+            X_train, y_train,
+            epochs=25,  # Reduced from 50 for faster historical generation
+            batch_size=2,
+            validation_data=validation_data,
+            verbose=0  # Silent training
+        )
+        
+        state['model'] = model
+        state['columns'] = columns
+        state['infer'] = make_inference_fn(model, TIMESTEPS, scaled_data.shape[1])
+    
+    state['n_sequences'] = len(X)
     
     # Make prediction using the last sequence
     target_col_index = df.columns.get_loc(target_column_name)
     last_sequence_scaled = scaled_data[-TIMESTEPS:]
     input_data = np.reshape(last_sequence_scaled, (1, TIMESTEPS, scaled_data.shape[1]))
     
-    predicted_value_scaled = model.predict(input_data, verbose=0)[0][0]
+    # Reuse the model's compiled forward pass instead of predict()'s per-call setup
+    predicted_value_scaled = float(state['infer'](tf.constant(input_data, dtype=tf.float32))[0, 0])
     
     # Inverse transform
-    dummy_array = np.zeros((1, len(df.columns)))
-    dummy_array[0, target_col_index] = predicted_value_scaled
-    inversed_prediction_array = scaler.inverse_transform(dummy_array)
-    final_prediction = inversed_prediction_array[0, target_col_index]
+    # MinMaxScaler is linear per column, so undo it for the target column alone
+    # (same formula inverse_transform applies, including for constant columns)
+    final_prediction = (predicted_value_scaled - scaler.min_[target_col_index]) / scaler.scale_[target_col_index]
     
     return final_prediction
 
@@ -193,6 +330,8 @@ def get_training_sources(files_used: list):
 
 def main():
     """Generate historical RNN predictions progressively."""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
     raw_dir = os.path.join(project_root, 'data', 'raw')
     output_dir = os.path.join(project_root, 'data', 'ChatGPTRNN')
@@ -201,8 +340,9 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     
     # Get all JSON files from raw directory
-    all_files = [f for f in os.listdir(raw_dir) if f.endswith('.json')]
-    all_files.sort()  # Chronological order
+    # scandir's entries already carry name and type - no extra stat per file
+    with os.scandir(raw_dir) as entries:
+        all_files = sorted(entry.name for entry in entries if entry.name.endswith('.json') and entry.is_file())  # Chronological order
     
     if len(all_files) < 2:
         print("generate_historical_rnn_predictions.main: Need at least 2 files to generate predictions")
@@ -210,6 +350,20 @@ def main():
     
     print(f"generate_historical_rnn_predictions.main: Found {len(all_files)} files to process")
     
+    # Parse each file once up front; every iteration slices the prefix it trains on
+    try:
+        full_df, rows_before = load_all_rows(all_files, raw_dir)
+    except ValueError as e:
+        print(f"generate_historical_rnn_predictions.main: {str(e)}")
+        return
+    
+    # One model per ticker, carried across dates and extended incrementally
+    model_states = {}
+    
+    # Running extremes over the rows trained on so far, grown as the prefix grows
+    scaler = RunningMinMax(full_df.shape[1])
+    scaled_rows = 0
+    
     # For each date (starting from the second), train on all previous data
     for i in range(1, len(all_files)):
         current_file = all_files[i]
@@ -232,12 +386,14 @@ def main():
         
         try:
             # Prepare training data
-            df = prepare_data_subset(training_files, raw_dir)
+            df = prepare_data_subset(full_df, rows_before[i])
+            scaler.update(full_df.iloc[scaled_rows:rows_before[i]].to_numpy(dtype=np.float32))
+            scaled_rows = rows_before[i]
             
             # Train models and make predictions for both tickers
             predictions = {}
             for ticker in ['OKLO', 'RKLB']:
-                pred_value = train_and_predict(df, ticker, prediction_date)
+                pred_value = train_and_predict(df, ticker, prediction_date, model_states.setdefault(ticker, {}), scaler)
                 if pred_value is not None:
                     predictions[ticker] = {
                         'predicted_next_day_pct': float(pred_value)
@@ -263,8 +419,12 @@ def main():
             
             # Save to file
             output_file = os.path.join(output_dir, f'{prediction_date}.json')
-            with open(output_file, 'w') as f:
-                json.dump(prediction_obj, f, indent=2)
+            if orjson is not None:
+                with open(output_file, 'wb') as f:
+                    f.write(orjson.dumps(prediction_obj, option=orjson.OPT_INDENT_2))
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(prediction_obj, f, indent=2)
             
             print(f"generate_historical_rnn_predictions.main: Saved prediction to {output_file}")
             
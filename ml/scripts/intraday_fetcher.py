@@ -4,10 +4,16 @@
 import os
 import sys
 import json
-import csv
+import logging
 from datetime import datetime, time
 from pathlib import Path
-import pytz
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+try:
+    import orjson  # Optional: much faster JSON encoding
+except ImportError:
+    orjson = None
 
 # Add project root to path for imports
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -15,6 +21,28 @@ sys.path.append(PROJECT_ROOT)
 
 from ml.services.alpha_vantage_client import AlphaVantageClient
 
+# Per-tick helper chatter goes through DEBUG so it costs nothing unless enabled
+logger = logging.getLogger(__name__)
+
+# Matches csv.writer's default terminator so existing day files stay uniform
+CSV_LINE_END = '\r\n'
+
+@lru_cache(maxsize=1)
+def _market_open_for_minute(minute_bucket: int, market_open: time, market_close: time, tz: ZoneInfo) -> tuple:
+    """Evaluate market hours once per wall-clock minute; returns (is_open, is_weekday, is_open_hours)."""
+    # Get current time in Eastern timezone
+    et_now = datetime.now(tz)
+    current_time = et_now.time()
+    current_weekday = et_now.weekday()  # 0=Monday, 6=Sunday
+    
+    # Check if it's a weekday (Monday-Friday)
+    is_weekday = current_weekday < 5
+    
+    # Check if within market hours
+    is_open_hours = market_open <= current_time <= market_close
+    
+    return is_weekday and is_open_hours, is_weekday, is_open_hours
+
 class IntradayMarketFetcher:
     """Handles 5-minute intraday market data collection from AlphaVantage."""
     
@@ -37,28 +65,21 @@ class IntradayMarketFetcher:
         # Market hours (Eastern Time)
         self.market_open = time(9, 30)  # 9:30 AM ET
         self.market_close = time(16, 0)  # 4:00 PM ET
-        self.eastern_tz = pytz.timezone('US/Eastern')
+        self.eastern_tz = ZoneInfo('America/New_York')
         
         print("intraday_fetcher.IntradayMarketFetcher.__init__: Fetcher initialized successfully")
     
     def is_market_hours(self) -> bool:
         """Check if current time is during market hours (9:30 AM - 4:00 PM ET)."""
-        print("intraday_fetcher.IntradayMarketFetcher.is_market_hours: Checking if market is open")
-        
-        # Get current time in Eastern timezone
-        et_now = datetime.now(self.eastern_tz)
-        current_time = et_now.time()
-        current_weekday = et_now.weekday()  # 0=Monday, 6=Sunday
-        
-        # Check if it's a weekday (Monday-Friday)
-        is_weekday = current_weekday < 5
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.is_market_hours: Checking if market is open")
         
-        # Check if within market hours
-        is_open_hours = self.market_open <= current_time <= self.market_close
+        # Repeated checks within the same minute reuse the cached answer
+        minute_bucket = int(datetime.now().timestamp() // 60)
+        is_open, is_weekday, is_open_hours = _market_open_for_minute(
+            minute_bucket, self.market_open, self.market_close, self.eastern_tz
+        )
         
-        is_open = is_weekday and is_open_hours
-        
-        print(f"intraday_fetcher.IntradayMarketFetcher.is_market_hours: Market open: {is_open} (weekday: {is_weekday}, hours: {is_open_hours})")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.is_market_hours: Market open: %s (weekday: %s, hours: %s)", is_open, is_weekday, is_open_hours)
         return is_open
     
     def get_csv_filename(self, date_str: str) -> str:
@@ -67,7 +88,7 @@ class IntradayMarketFetcher:
     
     def initialize_daily_csv(self, filepath: str):
         """Create CSV file with headers if it doesn't exist."""
-        print(f"intraday_fetcher.IntradayMarketFetcher.initialize_daily_csv: Initializing CSV at {filepath}")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.initialize_daily_csv: Initializing CSV at %s", filepath)
         
         if not os.path.exists(filepath):
             headers = [
@@ -81,65 +102,64 @@ class IntradayMarketFetcher:
                 'fetched_at'
             ]
             
-            with open(filepath, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(headers)
+            with open(filepath, 'wb') as csvfile:
+                csvfile.write((','.join(headers) + CSV_LINE_END).encode())
             
-            print(f"intraday_fetcher.IntradayMarketFetcher.initialize_daily_csv: Created new CSV file with headers")
+            logger.debug("intraday_fetcher.IntradayMarketFetcher.initialize_daily_csv: Created new CSV file with headers")
         else:
-            print(f"intraday_fetcher.IntradayMarketFetcher.initialize_daily_csv: CSV file already exists")
+            logger.debug("intraday_fetcher.IntradayMarketFetcher.initialize_daily_csv: CSV file already exists")
     
     def append_to_csv(self, filepath: str, data_rows: list):
-        """Append new data rows to existing CSV file."""
-        print(f"intraday_fetcher.IntradayMarketFetcher.append_to_csv: Appending {len(data_rows)} rows to CSV")
+        """Append new data rows (CSV line strings) to existing CSV file."""
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.append_to_csv: Appending %s rows to CSV", len(data_rows))
         
-        with open(filepath, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerows(data_rows)
+        # Rows are pre-formatted lines, so the whole batch is a single write
+        with open(filepath, 'ab', buffering=1 << 16) as csvfile:
+            csvfile.write(''.join(data_rows).encode())
         
-        print(f"intraday_fetcher.IntradayMarketFetcher.append_to_csv: Successfully appended data to CSV")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.append_to_csv: Successfully appended data to CSV")
     
     def fetch_current_quotes(self) -> dict:
         """Fetch current quotes for all tickers."""
-        print("intraday_fetcher.IntradayMarketFetcher.fetch_current_quotes: Fetching current quotes for all tickers")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.fetch_current_quotes: Fetching current quotes for all tickers")
         
+        # The client batches or threads the requests behind its shared rate limiter,
+        # and records per-symbol failures as error entries
         quotes = self.alpha_vantage.get_multiple_quotes(self.tickers)
         
-        print(f"intraday_fetcher.IntradayMarketFetcher.fetch_current_quotes: Fetched quotes for {len(quotes)} tickers")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.fetch_current_quotes: Fetched quotes for %s tickers", len(quotes))
         return quotes
     
     def quotes_to_csv_rows(self, quotes: dict, timestamp: str) -> list:
-        """Convert quotes data to CSV rows format."""
-        print("intraday_fetcher.IntradayMarketFetcher.quotes_to_csv_rows: Converting quotes to CSV format")
+        """Convert quotes data to CSV line strings."""
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.quotes_to_csv_rows: Converting quotes to CSV format")
         
         rows = []
         
         for symbol, quote_data in quotes.items():
             # Skip if there was an error fetching this quote
             if 'error' in quote_data:
-                print(f"intraday_fetcher.IntradayMarketFetcher.quotes_to_csv_rows: Skipping {symbol} due to error: {quote_data['error']}")
+                logger.warning("intraday_fetcher.IntradayMarketFetcher.quotes_to_csv_rows: Skipping %s due to error: %s", symbol, quote_data['error'])
                 continue
             
             # Create row with quote data
             # Note: For real-time quotes, we use current price as OHLC since it's a single point
-            row = [
-                timestamp,
-                quote_data.get('symbol', symbol),
-                quote_data.get('price', 0),        # open
-                quote_data.get('price', 0),        # high  
-                quote_data.get('price', 0),        # low
-                quote_data.get('price', 0),        # close
-                quote_data.get('volume', 0),       # volume
-                quote_data.get('fetched_at', '')   # fetched_at
-            ]
+            # Every field is a symbol, number or ISO timestamp, so none need CSV quoting
+            price = quote_data.get('price', 0)
+            row = (
+                f"{timestamp},{quote_data.get('symbol', symbol)},"
+                f"{price},{price},{price},{price},"                  # open, high, low, close
+                f"{quote_data.get('volume', 0)},"                     # volume
+                f"{quote_data.get('fetched_at', '')}{CSV_LINE_END}"  # fetched_at
+            )
             rows.append(row)
         
-        print(f"intraday_fetcher.IntradayMarketFetcher.quotes_to_csv_rows: Converted {len(rows)} quotes to CSV rows")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.quotes_to_csv_rows: Converted %s quotes to CSV rows", len(rows))
         return rows
     
-    def save_backup_json(self, quotes: dict, timestamp: str):
+    def save_backup_json(self, quotes: dict, timestamp: str, market_open: bool = None):
         """Save raw quotes data as JSON backup."""
-        print("intraday_fetcher.IntradayMarketFetcher.save_backup_json: Saving JSON backup")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.save_backup_json: Saving JSON backup")
         
         # Create backup filename
         date_str = datetime.now().strftime('%Y-%m-%d')
@@ -152,14 +172,18 @@ class IntradayMarketFetcher:
             'timestamp': timestamp,
             'quotes': quotes,
             'tickers_requested': self.tickers,
-            'market_hours_check': self.is_market_hours()
+            'market_hours_check': self.is_market_hours() if market_open is None else market_open
         }
         
-        # Save JSON backup
-        with open(json_filepath, 'w') as f:
-            json.dump(backup_data, f, indent=2)
+        # Save JSON backup (orjson writes UTF-8 bytes directly; stdlib json is the fallback)
+        if orjson is not None:
+            with open(json_filepath, 'wb') as f:
+                f.write(orjson.dumps(backup_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(json_filepath, 'w', encoding='utf-8') as f:
+                json.dump(backup_data, f, indent=2)
         
-        print(f"intraday_fetcher.IntradayMarketFetcher.save_backup_json: Backup saved to {json_filepath}")
+        logger.debug("intraday_fetcher.IntradayMarketFetcher.save_backup_json: Backup saved to %s", json_filepath)
     
     def run_intraday_fetch(self) -> bool:
         """Complete intraday fetch workflow."""
@@ -167,7 +191,8 @@ class IntradayMarketFetcher:
         
         try:
             # Check if market is open
-            if not self.is_market_hours():
+            market_open = self.is_market_hours()
+            if not market_open:
                 print("intraday_fetcher.IntradayMarketFetcher.run_intraday_fetch: Market closed - skipping fetch")
                 return False
             
@@ -196,7 +221,7 @@ class IntradayMarketFetcher:
                 self.append_to_csv(csv_filepath, csv_rows)
                 
                 # Save JSON backup (optional, for debugging)
-                self.save_backup_json(quotes, timestamp)
+                self.save_backup_json(quotes, timestamp, market_open)
                 
                 print(f"intraday_fetcher.IntradayMarketFetcher.run_intraday_fetch: ✅ SUCCESS - Saved {len(csv_rows)} data points to {csv_filepath}")
                 return True
@@ -210,6 +235,7 @@ class IntradayMarketFetcher:
 
 def main():
     """Main function to run intraday fetch."""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     print(f"intraday_fetcher.main: Starting intraday market data fetch at {datetime.now()}")
     
     try:
@@ -5,14 +5,26 @@
 import os
 # Suppress TensorFlow logging before other imports
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' 
+# oneDNN's LSTM kernels pay a large first-call warmup that single-window inference never amortises
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '0')
 
 import numpy as np
 import pandas as pd
+import tensorflow as tf
 from tensorflow.keras.models import load_model
 from joblib import load
 import sys
 
-def make_prediction(target_ticker: str):
+def configure_threads():
+    """Tunes TensorFlow's thread pools for single-window inference; only the CLI calls this, so importers keep their own settings."""
+    # One tiny graph at a time: spread each op across cores, but don't schedule ops in parallel
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(os.cpu_count())
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:
+        pass  # The runtime was already initialised
+
+def make_prediction(target_ticker: str) -> float:
     """Loads the model and latest data to make a single prediction."""
     PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
     MODEL_DIR = os.path.join(PROJECT_ROOT, 'ml', 'models')
@@ -29,30 +41,52 @@ def make_prediction(target_ticker: str):
     scaler = load(SCALER_PATH)
 
     # --- Load and Prepare Data ---
-    df = pd.read_csv(PROCESSED_DATA_PATH, index_col='date', parse_dates=True)
+    # Prefer prepare_data's Parquet copy: float32 dtypes and the date index come back as written
+    parquet_path = os.path.splitext(PROCESSED_DATA_PATH)[0] + '.parquet'
+    if os.path.exists(parquet_path):
+        df = pd.read_parquet(parquet_path, engine='pyarrow')
+    else:
+        df = pd.read_csv(PROCESSED_DATA_PATH, index_col='date', parse_dates=True)
+    df = df.astype(np.float32, copy=False)
     df.ffill(inplace=True)
     df.bfill(inplace=True)
     df.fillna(0, inplace=True)
 
+    # Scale in the exact column order train.py fitted, so the min/max rows and the
+    # target index line up with the model's input features
+    columns = list(scaler['columns'])
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise ValueError(f"predict.make_prediction: Processed data is missing {len(missing)} training columns: {missing[:5]}")
+    df = df[columns]
+
     target_column_name = f'{target_ticker}_{TARGET_FEATURE}'
-    target_col_index = df.columns.get_loc(target_column_name)
+    if target_column_name not in columns:
+        raise ValueError(f"predict.make_prediction: {target_column_name} was not among the training columns")
+    target_col_index = columns.index(target_column_name)
 
-    last_sequence_scaled = scaler.transform(df.tail(TIMESTEPS))
+    # scaler.gz holds train.py's per-column min/max; constant columns use a range of 1
+    data_min = scaler['min']
+    data_range = scaler['max'] - data_min
+    data_range[data_range == 0] = 1.0
+    last_sequence_scaled = (df.tail(TIMESTEPS).to_numpy(dtype=np.float32) - data_min) / data_range
     input_data = np.reshape(last_sequence_scaled, (1, TIMESTEPS, last_sequence_scaled.shape[1]))
 
     # --- Make Prediction ---
-    predicted_value_scaled = model.predict(input_data, verbose=0)[0][0]
+    # Calling the model directly skips predict()'s per-call data adapter setup
+    predicted_value_scaled = float(model(tf.constant(input_data, dtype=tf.float32), training=False)[0, 0])
 
     # --- Inverse Transform ---
-    dummy_array = np.zeros((1, len(df.columns)))
-    dummy_array[0, target_col_index] = predicted_value_scaled
-    inversed_prediction_array = scaler.inverse_transform(dummy_array)
-    final_prediction = inversed_prediction_array[0, target_col_index]
+    # Min/max scaling is linear per column, so undo it for the target column alone
+    final_prediction = predicted_value_scaled * data_range[target_col_index] + data_min[target_col_index]
 
-    # --- FINAL, CLEAN OUTPUT ---
-    # This is the only thing the script should print.
-    print(f'"{target_ticker}": {final_prediction:.4f}')
+    return float(final_prediction)
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        make_prediction(sys.argv[1].upper())
\ No newline at end of file
+        ticker = sys.argv[1].upper()
+        configure_threads()
+        final_prediction = make_prediction(ticker)
+        # --- FINAL, CLEAN OUTPUT ---
+        # This is the only thing the script should print.
+        print(f'"{ticker}": {final_prediction:.4f}')
\ No newline at end of file
@@ -3,56 +3,68 @@
 
 import os
 import json
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional
 
-def parse_single_json(file_path: str) -> Dict[str, Any]:
+try:
+    import orjson  # Optional: much faster JSON decoding
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Fixed feature layout; parse_single_json emits values in exactly this order
+TICKERS = ('OKLO', 'RKLB')
+TICKER_FIELDS = (
+    'close', 'pct_change', 'streak', 'confidence',
+    'predicted_next_day_pct', 'dip_onset_prob', 'dip_exhaustion_prob',
+)
+BENCHMARKS = ('SPY', 'VIXY', 'VIXM', 'VIX')
+COLUMNS = tuple(f'{ticker}_{field}' for ticker in TICKERS for field in TICKER_FIELDS) + \
+          tuple(f'{benchmark}_close' for benchmark in BENCHMARKS)
+
+def parse_single_json(file_path: str) -> Tuple[str, np.ndarray]:
     """
-    Loads a single JSON file and extracts key features into a flat dictionary.
+    Loads a single JSON file and extracts key features into a flat row.
     
     Args:
         file_path: The full path to the JSON file.
         
     Returns:
-        A dictionary containing the flattened data for one day.
+        The date string and a float32 vector of features ordered as COLUMNS.
     """
-    print(f"prepare_data.parse_single_json: Processing {os.path.basename(file_path)}")
-    
-    with open(file_path, 'r') as f:
-        data = json.load(f)
+    with open(file_path, 'rb') as f:
+        data = _json_loads(f.read())
         
-    row = {'date': data.get('date')}
+    tickers = data.get('tickers', {})
+    benchmarks = data.get('benchmarks', {})
     
-    # --- Tickers ---
-    # We focus on the main tickers of interest and their key metrics
-    for ticker in ['OKLO', 'RKLB']:
-        ticker_data = data.get('tickers', {}).get(ticker, {})
-        row[f'{ticker}_close'] = ticker_data.get('close')
-        row[f'{ticker}_pct_change'] = ticker_data.get('pct_change')
-        row[f'{ticker}_streak'] = ticker_data.get('streak')
-        row[f'{ticker}_confidence'] = ticker_data.get('confidence')
-        row[f'{ticker}_predicted_next_day_pct'] = ticker_data.get('predicted_next_day_pct') # This is our target
-        row[f'{ticker}_dip_onset_prob'] = ticker_data.get('dip_onset_prob')
-        row[f'{ticker}_dip_exhaustion_prob'] = ticker_data.get('dip_exhaustion_prob')
-
-    # --- Benchmarks ---
-    # Extract close prices for key market benchmarks
-    for benchmark in ['SPY', 'VIXY', 'VIXM', 'VIX']:
-        bench_data = data.get('benchmarks', {}).get(benchmark)
-        
-        # Benchmarks can be a number (VIX) or an object with a 'close' key
+    # Tickers: every field for each ticker, in schema order (predicted_next_day_pct is the target)
+    values = [tickers.get(ticker, {}).get(field) for ticker in TICKERS for field in TICKER_FIELDS]
+    
+    # Benchmarks can be a number (VIX) or an object with a 'close' key
+    for benchmark in BENCHMARKS:
+        bench_data = benchmarks.get(benchmark)
         if isinstance(bench_data, dict):
-            row[f'{benchmark}_close'] = bench_data.get('close')
-        elif isinstance(bench_data, (int, float)):
-            row[f'{benchmark}_close'] = bench_data
-        else:
-            row[f'{benchmark}_close'] = None
-            
-    return row
+            bench_data = bench_data.get('close')
+        values.append(bench_data if isinstance(bench_data, (int, float)) else None)
+    
+    # None becomes NaN, filled later like any other missing value
+    return data.get('date'), np.array(values, dtype=np.float32)
+
+def _parse_or_none(file_path: str) -> Optional[Tuple[str, np.ndarray]]:
+    """Parse one file for the worker pool, reporting failures instead of raising."""
+    try:
+        return parse_single_json(file_path)
+    except Exception as e:
+        print(f"prepare_data.process_all_data: ERROR processing {os.path.basename(file_path)}: {e}")
+        return None
 
 def process_all_data(raw_dir: str, output_path: str):
     """
-    Processes all JSON files in the raw_dir, combines them, and saves to CSV.
+    Processes all JSON files in the raw_dir, combines them, and saves to CSV
+    plus a Parquet copy alongside it.
     
     Args:
         raw_dir: Directory containing the raw JSON files.
@@ -60,38 +72,49 @@ def process_all_data(raw_dir: str, output_path: str):
     """
     print(f"prepare_data.process_all_data: Starting data processing from '{raw_dir}'")
     
-    all_files = [f for f in os.listdir(raw_dir) if f.endswith('.json')]
-    all_files.sort() # Ensure chronological order
+    # scandir's entries already carry name, type and full path - no extra stat or join per file.
+    # Full paths share the raw_dir prefix, so sorting them keeps chronological order.
+    with os.scandir(raw_dir) as entries:
+        all_files = sorted(entry.path for entry in entries if entry.name.endswith('.json') and entry.is_file())
     
     if not all_files:
         print("prepare_data.process_all_data: No JSON files found. Exiting.")
         return
 
-    all_rows: List[Dict[str, Any]] = []
-    for filename in all_files:
-        file_path = os.path.join(raw_dir, filename)
-        try:
-            row = parse_single_json(file_path)
-            all_rows.append(row)
-        except Exception as e:
-            print(f"prepare_data.process_all_data: ERROR processing {filename}: {e}")
+    # File reads and JSON decoding release the GIL, so a thread pool overlaps them
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        parsed = list(executor.map(_parse_or_none, all_files))
+    
+    all_rows: List[Tuple[str, np.ndarray]] = [row for row in parsed if row is not None]
+    print(f"prepare_data.process_all_data: Parsed {len(all_rows)} of {len(all_files)} files")
             
     # Create DataFrame
-    df = pd.DataFrame(all_rows)
+    # Fill a column-major float32 buffer so each feature column is contiguous
+    arr = np.empty((len(all_rows), len(COLUMNS)), dtype=np.float32, order='F')
+    for i, (_, values) in enumerate(all_rows):
+        arr[i] = values
+    dates = pd.DatetimeIndex(pd.to_datetime([date for date, _ in all_rows]), name='date')
+    df = pd.DataFrame(arr, columns=list(COLUMNS), index=dates, copy=False)
     
-    # Set date as index
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values(by='date').set_index('date')
+    # File names are ISO dates, so this only re-sorts if a file's own date disagrees
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
     
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     # Save to CSV
     df.to_csv(output_path)
+    
+    # Parquet copy keeps the float32 dtypes and date index, so readers skip text parsing
+    parquet_path = os.path.splitext(output_path)[0] + '.parquet'
+    df.to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+    
     print(f"prepare_data.process_all_data: Successfully processed {len(df)} entries.")
-    print(f"prepare_data.process_all_data: Data saved to '{output_path}'")
+    print(f"prepare_data.process_all_data: Data saved to '{output_path}' and '{parquet_path}'")
 
-if __name__ == "__main__":
+def run():
+    """Process the project's raw data directory into the features CSV."""
     # Define relative paths
     # The script is in ml/scripts, so we go up two levels to the project root
     PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -100,4 +123,7 @@ if __name__ == "__main__":
     
     process_all_data(RAW_DATA_DIR, PROCESSED_DATA_PATH)
 
+if __name__ == "__main__":
+    run()
+
 # File: ml/scripts/prepare_data.py - Character count: 3458
\ No newline at end of file
@@ -1,82 +1,61 @@
 # ml/scripts/run_pipeline.py
-import subprocess
 import json
 import os
 import sys
 
-def run_command(command):
-    """Runs a command with the correct environment and working directory."""
-    print(f"--- Running: {' '.join(command)} ---")
-    
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    
-    # Create a copy of the current environment and add our project root to the PYTHONPATH
-    # This ensures that 'from ml.src...' imports work correctly in the subprocesses.
-    env = os.environ.copy()
-    env['PYTHONPATH'] = project_root + os.pathsep + env.get('PYTHONPATH', '')
-    
-    process = subprocess.run(
-        command, 
-        capture_output=True, 
-        text=True, 
-        cwd=project_root, 
-        env=env  # Pass the modified environment to the subprocess
-    )
-    
-    if process.returncode != 0:
-        print("--- ERROR ---")
-        print("STDOUT:")
-        print(process.stdout)
-        print("STDERR:")
-        print(process.stderr)
-        raise RuntimeError(f"Command failed: {' '.join(command)}")
-    
-    print(process.stdout.strip())
-    return process.stdout.strip()
+try:
+    import orjson  # Optional: much faster JSON encoding
+except ImportError:
+    orjson = None
 
-def main():
-    PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    PYTHON_EXECUTABLE = sys.executable
-    
-    # Define script paths
-    prepare_script = os.path.join('ml', 'scripts', 'prepare_data.py')
-    train_script = os.path.join('ml', 'scripts', 'train.py')
-    predict_script = os.path.join('ml', 'scripts', 'predict.py')
+# Add project root to path so 'from ml.src...' imports resolve without PYTHONPATH
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(PROJECT_ROOT)
+
+# Every step runs in this process, so TensorFlow is imported and initialised once
+from ml.scripts import prepare_data, train, predict, save_daily_prediction
 
+def main():
     # 1. Prepare Data
-    run_command([PYTHON_EXECUTABLE, '-m', 'ml.scripts.prepare_data'])
+    print("--- Running: prepare_data ---")
+    prepare_data.run()
 
     tickers = ["OKLO", "RKLB"]
     
     # 2. Train Models
+    import tensorflow as tf  # Already loaded by train; imported here for the session and policy resets
     for ticker in tickers:
-        run_command([PYTHON_EXECUTABLE, '-m', 'ml.scripts.train', ticker])
+        print(f"--- Running: train {ticker} ---")
+        train.main(ticker)
+        # Free the finished model's graph so the next ticker doesn't train alongside it in memory
+        tf.keras.backend.clear_session()
+
+    # configure_precision may have switched to mixed_float16 for GPU training; predict in float32
+    tf.keras.mixed_precision.set_global_policy('float32')
 
     # 3. Generate Predictions
     predictions = {}
     for ticker in tickers:
-        # The output is now just one clean line: '"OKLO": 0.1234'
-        output = run_command([PYTHON_EXECUTABLE, '-m', 'ml.scripts.predict', ticker])
-        try:
-            key, value = output.strip().replace('"', '').split(':')
-            predictions[key.strip()] = float(value)
-        except (ValueError, IndexError) as e:
-            print(f"--- PARSE ERROR --- Could not parse prediction output: '{output}'")
-            continue
+        print(f"--- Running: predict {ticker} ---")
+        predictions[ticker] = predict.make_prediction(ticker)
+        print(f'"{ticker}": {predictions[ticker]:.4f}')
 
     # 4. Save predictions to a file
     output_data = {"ml_predictions": predictions}
     output_path = os.path.join(PROJECT_ROOT, "frontend", "public", "latest_ml_predictions.json")
     
-    with open(output_path, 'w') as f:
-        json.dump(output_data, f, indent=2)
+    if orjson is not None:
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, indent=2)
         
     print(f"--- Pipeline complete! Predictions saved to {output_path} ---")
 
     # 5. Save daily predictions with metadata for historical tracking
     print("--- Step 5: Saving daily predictions for historical tracking ---")
-    save_daily_script = os.path.join('ml', 'scripts', 'save_daily_prediction.py')
-    run_command([PYTHON_EXECUTABLE, '-m', 'ml.scripts.save_daily_prediction'])
+    save_daily_prediction.save_daily_prediction(predictions)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,22 +3,36 @@
 
 import os
 import json
+import mmap
 import sys
 from datetime import datetime, timedelta
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
 
+try:
+    import orjson  # Optional: much faster JSON encoding/decoding
+except ImportError:
+    orjson = None
+
 def get_training_data_metadata(processed_data_path: str):
     """Extract metadata about the training data sources."""
     print(f"save_daily_prediction.get_training_data_metadata: Analyzing training data from {processed_data_path}")
     
-    # Load the processed data to get date range and feature info
-    df = pd.read_csv(processed_data_path, index_col='date', parse_dates=True)
-    
-    start_date = df.index.min().strftime('%Y-%m-%d')
-    end_date = df.index.max().strftime('%Y-%m-%d')
-    feature_count = len(df.columns)
-    training_samples = len(df)
+    # Only the column names and the date column are needed - skip every feature column
+    parquet_path = os.path.splitext(processed_data_path)[0] + '.parquet'
+    if os.path.exists(parquet_path):
+        # The Parquet footer carries the schema; only the date column's pages are read
+        header = pq.read_schema(parquet_path).names
+        dates = pq.read_table(parquet_path, columns=['date']).column('date').to_pandas()
+    else:
+        header = pd.read_csv(processed_data_path, nrows=0).columns
+        dates = pd.read_csv(processed_data_path, usecols=['date'], parse_dates=['date'])['date']
+    
+    start_date = dates.min().strftime('%Y-%m-%d')
+    end_date = dates.max().strftime('%Y-%m-%d')
+    feature_count = len(header) - 1  # Every column except the date index
+    training_samples = len(dates)
     
     # Get list of source JSON files from data/raw that fall within this date range
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -26,22 +40,12 @@ def get_training_data_metadata(processed_data_path: str):
     
     source_files = []
     if os.path.exists(raw_data_dir):
-        for filename in os.listdir(raw_data_dir):
-            if filename.endswith('.json'):
-                # Extract date from filename (assuming format like "2024-01-15.json")
-                try:
-                    file_date_str = filename.replace('.json', '')
-                    file_date = datetime.strptime(file_date_str, '%Y-%m-%d')
-                    start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-                    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-                    
-                    if start_dt <= file_date <= end_dt:
-                        source_files.append(filename)
-                except ValueError:
-                    # Skip files that don't match expected date format
-                    continue
-    
-    source_files.sort()  # Ensure chronological order
+        # One directory pass into a set, then walk the calendar: the result is already in
+        # chronological order and each candidate is an O(1) membership test
+        with os.scandir(raw_data_dir) as entries:
+            existing = {entry.name for entry in entries if entry.name.endswith('.json') and entry.is_file()}
+        candidates = (f'{day:%Y-%m-%d}.json' for day in pd.date_range(start_date, end_date, freq='D'))
+        source_files = [name for name in candidates if name in existing]
     
     return {
         'training_data_sources': source_files,
@@ -53,6 +57,54 @@ def get_training_data_metadata(processed_data_path: str):
         'training_samples': training_samples
     }
 
+def last_logged_date(log_path: str):
+    """Return the date of the last meta row in the prediction log, or None if there is none."""
+    if not os.path.exists(log_path) or os.path.getsize(log_path) == 0:
+        return None
+    
+    # Meta rows are written with 'type' as their first key, so the last one is a reverse
+    # search from the end of the mapping - the rest of the log is never paged in
+    with open(log_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = mm.rfind(b'{"type":"meta"')
+        if start == -1:
+            return None
+        end = mm.find(b'\n', start)
+        line = mm[start:end if end != -1 else len(mm)]
+    
+    row = orjson.loads(line) if orjson is not None else json.loads(line)
+    return row.get('date')
+
+def append_prediction_log(log_path: str, prediction_obj: dict):
+    """Append one meta row plus one row per ticker to the newline-delimited prediction log, once per date."""
+    date = prediction_obj['date']
+    
+    # A same-day rerun still rewrites {date}.json, but the log keeps the day's first rows only
+    if last_logged_date(log_path) == date:
+        print(f"save_daily_prediction.append_prediction_log: {log_path} already has rows for {date}, skipping append")
+        return
+    
+    rows = [{
+        'type': 'meta',
+        'date': date,
+        'created_at': prediction_obj['created_at'],
+        'schema_version': prediction_obj['schema_version'],
+        'metadata': prediction_obj['metadata']
+    }]
+    rows.extend(
+        {'type': 'prediction', 'date': date, 'ticker': ticker, **values}
+        for ticker, values in prediction_obj['predictions'].items()
+    )
+    
+    # Encode every row first so the whole day lands in the log with a single append
+    if orjson is not None:
+        payload = b''.join(orjson.dumps(row, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n' for row in rows)
+    else:
+        payload = ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows).encode('utf-8')
+    with open(log_path, 'ab') as f:
+        f.write(payload)
+    
+    print(f"save_daily_prediction.append_prediction_log: Appended {len(rows)} rows to {log_path}")
+
 def save_daily_prediction(predictions_data: dict):
     """Save today's RNN predictions with metadata to the ChatGPTRNN folder."""
     print(f"save_daily_prediction.save_daily_prediction: Saving predictions with {len(predictions_data)} tickers")
@@ -64,8 +116,9 @@ def save_daily_prediction(predictions_data: dict):
     rnn_data_dir = os.path.join(project_root, 'data', 'ChatGPTRNN')
     os.makedirs(rnn_data_dir, exist_ok=True)
     
-    # Get today's date for the filename
-    today = datetime.now().strftime('%Y-%m-%d')
+    # Read the clock once so the filename and created_at always agree, even across midnight
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
     output_file = os.path.join(rnn_data_dir, f'{today}.json')
     
     # Get metadata about training data
@@ -75,26 +128,30 @@ def save_daily_prediction(predictions_data: dict):
         'timesteps': 3  # This should match the TIMESTEPS constant in your training script
     })
     
-    # Build the prediction object
+    # Build the prediction object; predictions are converted to the expected format in one pass
     prediction_obj = {
         'date': today,
-        'created_at': datetime.now().isoformat(),
-        'predictions': {},
+        'created_at': now.isoformat(),
+        'predictions': {
+            ticker: {'predicted_next_day_pct': float(predicted_value)}
+            for ticker, predicted_value in predictions_data.items()
+        },
         'metadata': metadata,
         'schema_version': '1.0'
     }
     
-    # Convert predictions to the expected format
-    for ticker, predicted_value in predictions_data.items():
-        prediction_obj['predictions'][ticker] = {
-            'predicted_next_day_pct': float(predicted_value)
-        }
-    
-    # Save to file
-    with open(output_file, 'w') as f:
-        json.dump(prediction_obj, f, indent=2)
+    # Save to file (orjson writes UTF-8 bytes directly; stdlib json is the fallback)
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(prediction_obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(prediction_obj, f, indent=2)
     
     print(f"save_daily_prediction.save_daily_prediction: Saved predictions to {output_file}")
+    
+    # Append-only history: one JSON object per line, greppable and stream-parseable
+    append_prediction_log(os.path.join(rnn_data_dir, 'predictions.jsonl'), prediction_obj)
     return output_file
 
 def main():
@@ -106,9 +163,14 @@ def main():
         print("save_daily_prediction.main: No latest ML predictions file found")
         return
     
-    # Load the latest predictions
-    with open(latest_predictions_path, 'r') as f:
-        data = json.load(f)
+    # Load the latest predictions straight from a read-only mapping: the kernel pages the
+    # file in on demand and orjson parses the buffer without an intermediate bytes copy
+    with open(latest_predictions_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if orjson is not None:
+            with memoryview(mm) as view:
+                data = orjson.loads(view)
+        else:
+            data = json.loads(mm[:])
     
     predictions = data.get('ml_predictions', {})
     if not predictions:
@@ -4,10 +4,17 @@
 import os
 import subprocess
 import sys
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import json
 
+# A successful auth check is remembered across runs for a few minutes
+AUTH_CACHE_PATH = Path.home() / '.cache' / 'st0c-sync' / 'last_auth.json'
+AUTH_CACHE_TTL_SECONDS = 300
+
 class IntradayDataSyncer:
     """Handles downloading intraday market data from Google Cloud VM."""
     
@@ -21,6 +28,9 @@ class IntradayDataSyncer:
         self.vm_user = "deric_o_ortiz"
         self.vm_project_path = f"/home/{self.vm_user}/proj-st0c"
         
+        # Concurrent per-file scp downloads when the batch download can't be used
+        self.max_parallel_downloads = 4
+        
         # Local paths
         self.local_project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
         self.local_intraday_dir = os.path.join(self.local_project_root, 'data', 'intraday')
@@ -36,20 +46,55 @@ class IntradayDataSyncer:
         """Check if gcloud is authenticated and can connect to VM."""
         print("sync_intraday_data.IntradayDataSyncer.check_gcloud_auth: Checking gcloud authentication")
         
+        if self._auth_cache_is_fresh():
+            print("sync_intraday_data.IntradayDataSyncer.check_gcloud_auth: ✅ gcloud authentication verified recently (cached)")
+            return True
+        
+        is_authenticated = self._check_auth_impl(self.vm_name, self.vm_zone)
+        if is_authenticated:
+            self._write_auth_cache()
+        return is_authenticated
+    
+    def _auth_cache_is_fresh(self) -> bool:
+        """Return True if a successful auth check for this VM was recorded within the TTL."""
+        try:
+            if time.time() - AUTH_CACHE_PATH.stat().st_mtime > AUTH_CACHE_TTL_SECONDS:
+                return False
+            cached = json.loads(AUTH_CACHE_PATH.read_text())
+            return cached.get('vm_name') == self.vm_name and cached.get('vm_zone') == self.vm_zone
+        except (OSError, ValueError):
+            return False
+    
+    def _write_auth_cache(self):
+        """Record a successful auth check; failing to write the cache is never fatal."""
+        try:
+            AUTH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            AUTH_CACHE_PATH.write_text(json.dumps({
+                'vm_name': self.vm_name,
+                'vm_zone': self.vm_zone,
+                'checked_at': datetime.now().isoformat()
+            }))
+        except OSError as e:
+            print(f"sync_intraday_data.IntradayDataSyncer._write_auth_cache: Could not write auth cache: {e}")
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _check_auth_impl(vm_name: str, vm_zone: str) -> bool:
+        """Run the gcloud connectivity check; memoized for the process lifetime."""
         try:
             # Test gcloud connectivity
             result = subprocess.run([
                 'gcloud', 'compute', 'instances', 'list', 
-                '--filter', f'name={self.vm_name}',
-                '--zones', self.vm_zone
+                '--filter', f'name={vm_name}',
+                '--zones', vm_zone
             ], capture_output=True, text=True, timeout=30)
             
             if result.returncode != 0:
                 print(f"sync_intraday_data.IntradayDataSyncer.check_gcloud_auth: ❌ gcloud command failed: {result.stderr}")
                 return False
             
-            if self.vm_name not in result.stdout:
-                print(f"sync_intraday_data.IntradayDataSyncer.check_gcloud_auth: ❌ VM {self.vm_name} not found")
+            if vm_name not in result.stdout:
+                print(f"sync_intraday_data.IntradayDataSyncer.check_gcloud_auth: ❌ VM {vm_name} not found")
                 return False
             
             print("sync_intraday_data.IntradayDataSyncer.check_gcloud_auth: ✅ gcloud authentication successful")
@@ -163,50 +208,98 @@ class IntradayDataSyncer:
             print(f"sync_intraday_data.IntradayDataSyncer.download_intraday_file: Error downloading {filename}: {e}")
             return False
     
+    def download_intraday_files(self, filenames: list) -> list:
+        """Download several intraday CSV files from VM with one scp invocation.
+        
+        Returns the filenames that arrived non-empty. If the batch command
+        fails, nothing is trusted and the caller falls back to per-file downloads.
+        """
+        print(f"sync_intraday_data.IntradayDataSyncer.download_intraday_files: Downloading {len(filenames)} files in one batch")
+        
+        try:
+            # gcloud scp accepts many sources, so the SSH handshake is paid once for the batch
+            remote_paths = [
+                f'{self.vm_user}@{self.vm_name}:{self.vm_project_path}/data/intraday/{filename}'
+                for filename in filenames
+            ]
+            
+            result = subprocess.run([
+                'gcloud', 'compute', 'scp',
+                *remote_paths,
+                self.local_intraday_dir,
+                '--zone', self.vm_zone
+            ], capture_output=True, text=True, timeout=60 + 15 * len(filenames))
+            
+            if result.returncode != 0:
+                print(f"sync_intraday_data.IntradayDataSyncer.download_intraday_files: Batch download failed: {result.stderr}")
+                return []
+            
+            # Verify each file was downloaded and has content
+            downloaded = []
+            for filename in filenames:
+                local_path = os.path.join(self.local_intraday_dir, filename)
+                if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
+                    downloaded.append(filename)
+            
+            print(f"sync_intraday_data.IntradayDataSyncer.download_intraday_files: ✅ Downloaded {len(downloaded)}/{len(filenames)} files")
+            return downloaded
+            
+        except subprocess.TimeoutExpired:
+            print("sync_intraday_data.IntradayDataSyncer.download_intraday_files: Batch download timed out")
+            return []
+        except Exception as e:
+            print(f"sync_intraday_data.IntradayDataSyncer.download_intraday_files: Error in batch download: {e}")
+            return []
+    
     def download_processed_files(self) -> bool:
         """Download processed intraday feature files from VM."""
         print("sync_intraday_data.IntradayDataSyncer.download_processed_files: Downloading processed files")
         
         processed_files = [
             'intraday_features.csv',
+            'intraday_features.parquet',
+            'intraday_features.npy',
+            'intraday_features.json',
             'combined_features.csv'  # In case they combine OpenAI + intraday data
         ]
         
         success_count = 0
+        remote_dir = f'{self.vm_project_path}/ml/processed_data'
         
-        for filename in processed_files:
-            try:
-                remote_path = f'{self.vm_user}@{self.vm_name}:{self.vm_project_path}/ml/processed_data/{filename}'
-                local_path = os.path.join(self.local_processed_dir, filename)
-                
-                # Check if file exists on VM first
-                check_result = subprocess.run([
-                    'gcloud', 'compute', 'ssh', f'{self.vm_user}@{self.vm_name}',
-                    '--zone', self.vm_zone,
-                    '--command', f'test -f {self.vm_project_path}/ml/processed_data/{filename} && echo "EXISTS" || echo "NOT_FOUND"'
-                ], capture_output=True, text=True, timeout=30)
-                
-                if "NOT_FOUND" in check_result.stdout:
+        try:
+            # One SSH round trip lists which candidates exist (ls prints only the ones it finds)
+            check_result = subprocess.run([
+                'gcloud', 'compute', 'ssh', f'{self.vm_user}@{self.vm_name}',
+                '--zone', self.vm_zone,
+                '--command', f'cd {remote_dir} && ls {" ".join(processed_files)} 2>/dev/null'
+            ], capture_output=True, text=True, timeout=30)
+            
+            existing = set(check_result.stdout.split())
+            available_files = [f for f in processed_files if f in existing]
+            
+            for filename in processed_files:
+                if filename not in existing:
                     print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: Processed file not found on VM: {filename}")
-                    continue
-                
-                # Download the file
+            
+            if available_files:
+                # Download every available file with a single scp
                 result = subprocess.run([
                     'gcloud', 'compute', 'scp',
-                    remote_path,
-                    local_path,
+                    *[f'{self.vm_user}@{self.vm_name}:{remote_dir}/{filename}' for filename in available_files],
+                    self.local_processed_dir,
                     '--zone', self.vm_zone
-                ], capture_output=True, text=True, timeout=60)
+                ], capture_output=True, text=True, timeout=60 + 15 * len(available_files))
                 
-                if result.returncode == 0 and os.path.exists(local_path):
-                    print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: ✅ Downloaded {filename}")
-                    success_count += 1
-                else:
-                    print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: Failed to download {filename}")
-                    
-            except Exception as e:
-                print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: Error with {filename}: {e}")
-                continue
+                for filename in available_files:
+                    local_path = os.path.join(self.local_processed_dir, filename)
+                    if result.returncode == 0 and os.path.exists(local_path):
+                        print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: ✅ Downloaded {filename}")
+                        success_count += 1
+                    else:
+                        print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: Failed to download {filename}")
+                        
+        except Exception as e:
+            print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: Error downloading processed files: {e}")
         
         print(f"sync_intraday_data.IntradayDataSyncer.download_processed_files: Downloaded {success_count}/{len(processed_files)} processed files")
         return success_count > 0
@@ -220,8 +313,19 @@ class IntradayDataSyncer:
             'failed': []
         }
         
+        # One scp for everything; only files the batch didn't deliver are retried one by one
+        downloaded = set(self.download_intraday_files(filenames)) if filenames else set()
+        retry_files = [f for f in filenames if f not in downloaded]
+        
+        # Retries are independent scp processes blocked on the network, so run a few at once
+        # (capped to stay clear of gcloud/SSH rate limits)
+        retried = {}
+        if retry_files:
+            with ThreadPoolExecutor(max_workers=min(self.max_parallel_downloads, len(retry_files))) as executor:
+                retried = dict(zip(retry_files, executor.map(self.download_intraday_file, retry_files)))
+        
         for filename in filenames:
-            if self.download_intraday_file(filename):
+            if filename in downloaded or retried.get(filename):
                 results['success'].append(filename)
             else:
                 results['failed'].append(filename)
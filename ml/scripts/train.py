@@ -2,63 +2,177 @@
 # This script loads processed data, prepares it for the RNN, and runs training.
 
 import os
+import glob
+import hashlib
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
-from ml.src.model import build_model # Import our model builder
-from joblib import dump
+from numpy.lib.stride_tricks import sliding_window_view
+from joblib import dump, load
 
 # --- Configuration ---
 # How many past days of data to use for predicting the next day.
 TIMESTEPS = 3 
 TARGET_FEATURE = 'predicted_next_day_pct'
+# Mini-batch size for training; single-sample steps spend their time on dispatch, not math.
+# (Training originally ran with batch_size=1.)
+BATCH_SIZE = 32
+# How many times to go over the data
+EPOCHS = 50
+# Adam's default step size; raise it alongside --batch-size for large batches.
+LEARNING_RATE = 1e-3
+# Training steps XLA runs per call into the compiled graph; fewer Python <-> TF round trips.
+STEPS_PER_EXECUTION = 50
+# Recurrent layer type: 'lstm', or 'gru' for fewer gates per step at similar accuracy.
+RNN_CELL = 'lstm'
+
+def configure_precision():
+    """Enables TF32 and float16 mixed precision when a GPU is available; returns the distribution strategy."""
+    import tensorflow as tf
+    
+    # TF32 tensor cores only change GEMM internals on Ampere+; a no-op elsewhere
+    tf.config.experimental.enable_tensor_float_32_execution(True)
+    gpus = tf.config.list_physical_devices('GPU')
+    if not gpus:
+        # CPUs without native half-precision units run float16 slower than float32
+        print("train.configure_precision: No GPU found, training in float32")
+        return tf.distribute.get_strategy()
+    # compile() wraps the optimizer in a LossScaleOptimizer automatically under this policy
+    tf.keras.mixed_precision.set_global_policy('mixed_float16')
+    print("train.configure_precision: GPU found, training with mixed_float16")
+    
+    # Mirror the model across every visible GPU; a single device keeps the default strategy
+    if len(gpus) > 1:
+        print(f"train.configure_precision: Training on {len(gpus)} GPUs with MirroredStrategy")
+        return tf.distribute.MirroredStrategy()
+    return tf.distribute.get_strategy()
 
 def load_and_preprocess_data(file_path: str):
     """Loads and preprocesses data from the CSV file."""
     print(f"train.load_and_preprocess_data: Loading data from {file_path}")
-    df = pd.read_csv(file_path, index_col='date', parse_dates=True)
-    
-    # Simple forward-fill to handle missing values
-    df.fillna(method='ffill', inplace=True)
-    df.fillna(method='bfill', inplace=True) # Backward fill for any remaining NaNs at the start
+    # Prefer prepare_data's Parquet copy: a columnar load with the date index already typed
+    parquet_path = os.path.splitext(file_path)[0] + '.parquet'
+    if os.path.exists(parquet_path):
+        df = pd.read_parquet(parquet_path, engine='pyarrow')
+    else:
+        try:
+            # The pyarrow engine parses the CSV with multithreaded C++ instead of pandas' own reader
+            df = pd.read_csv(file_path, engine='pyarrow', parse_dates=['date']).set_index('date')
+        except ImportError:
+            df = pd.read_csv(file_path, index_col='date', parse_dates=['date'])
     
-    if df.isnull().sum().sum() > 0:
-        print("train.load_and_preprocess_data: Warning! Null values remain after filling.")
-        print(df.isnull().sum())
-        # As a last resort, fill remaining NaNs with 0
-        df.fillna(0, inplace=True)
+    # Forward-fill, back-fill and zero-fill in one go on the raw array; a frame with no gaps
+    # costs a single isnan scan
+    values = df.to_numpy(dtype=np.float64)
+    missing = np.isnan(values)
+    if missing.any():
+        rows = np.arange(len(values))[:, None]
+        # Forward-fill: every cell reads from the last row that had data in its column
+        source_row = np.where(missing, 0, rows)
+        np.maximum.accumulate(source_row, axis=0, out=source_row)
+        values = np.take_along_axis(values, source_row, axis=0)
+        
+        # Backward fill for any remaining NaNs at the start: the column's first observed value
+        has_data = ~missing.all(axis=0)
+        first_valid = missing.argmin(axis=0)
+        leading = (rows < first_valid) & has_data
+        values = np.where(leading, values[first_valid, np.arange(values.shape[1])], values)
+        
+        if not has_data.all():
+            print("train.load_and_preprocess_data: Warning! Null values remain after filling.")
+            print(f"train.load_and_preprocess_data: Columns with no data: {list(df.columns[~has_data])}")
+            # As a last resort, fill remaining NaNs with 0
+            values[:, ~has_data] = 0.0
+        
+        df = pd.DataFrame(values, index=df.index, columns=df.columns)
         
     print("train.load_and_preprocess_data: Data loaded and cleaned.")
     return df
 
+def fit_min_max(values: np.ndarray, columns: list) -> dict:
+    """Returns the per-column min/max scaler saved to scaler.gz."""
+    return {
+        'min': values.min(axis=0),
+        'max': values.max(axis=0),
+        'columns': columns
+    }
+
+def apply_min_max(values: np.ndarray, scaler: dict) -> np.ndarray:
+    """Scales values to [0, 1] per column; constant columns map to 0 like MinMaxScaler."""
+    data_range = scaler['max'] - scaler['min']
+    data_range[data_range == 0] = 1.0
+    # Row-major layout keeps each window in the strided sequence view a contiguous block.
+    return np.ascontiguousarray((values - scaler['min']) / data_range, dtype=np.float32)
+
+def load_scaled_data(file_path: str):
+    """Returns (scaled_data, columns, scaler), reusing a cached copy while the source file is unchanged."""
+    # Key the cache on the file actually read and its mtime; any rewrite by prepare_data invalidates it
+    parquet_path = os.path.splitext(file_path)[0] + '.parquet'
+    source_path = parquet_path if os.path.exists(parquet_path) else file_path
+    key = hashlib.blake2b(f'{os.path.abspath(source_path)}:{os.path.getmtime(source_path)}'.encode(), digest_size=8).hexdigest()
+    
+    cache_dir = os.path.join(os.path.dirname(file_path), 'cache')
+    data_cache_path = os.path.join(cache_dir, f'scaled_{key}.npy')
+    meta_cache_path = os.path.join(cache_dir, f'scaled_{key}.joblib')
+    
+    # The metadata file is written last, so its presence means the array is complete
+    if os.path.exists(meta_cache_path) and os.path.exists(data_cache_path):
+        print(f"train.load_scaled_data: Using cached scaled data {data_cache_path}")
+        meta = load(meta_cache_path)
+        # Memory-mapped: sequences are windowed straight over the file-backed array
+        return np.load(data_cache_path, mmap_mode='r'), meta['columns'], meta['scaler']
+    
+    df = load_and_preprocess_data(file_path)
+    
+    # --- Feature Scaling ---
+    # Scale all features to be between 0 and 1. This is crucial for neural networks.
+    # float32 is what Keras trains in anyway; converting once here halves every copy downstream.
+    columns = list(df.columns)
+    values = df.to_numpy(dtype=np.float32)
+    scaler = fit_min_max(values, columns)
+    scaled_data = apply_min_max(values, scaler)
+    
+    # Replace any cache left over from an older version of the data
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale_path in glob.glob(os.path.join(cache_dir, 'scaled_*')):
+        os.remove(stale_path)
+    np.save(data_cache_path, scaled_data)
+    dump({'columns': columns, 'scaler': scaler}, meta_cache_path)
+    print(f"train.load_scaled_data: Cached scaled data to {data_cache_path}")
+    
+    return scaled_data, columns, scaler
+
 def create_sequences(data, target_col_index, timesteps):
     """Creates sequences of data for the RNN."""
-    X, y = [], []
-    for i in range(len(data) - timesteps):
-        X.append(data[i:(i + timesteps)])
-        y.append(data[i + timesteps, target_col_index])
-    return np.array(X), np.array(y)
+    n = len(data) - timesteps
+    if n <= 0:
+        return np.empty((0, timesteps, data.shape[1]), dtype=data.dtype), np.empty((0,), dtype=data.dtype)
+    
+    # Windows are a strided view over data (no copy); the last one has no next-day target.
+    # Targets are one column slice taken once - keep this out of any per-window loop.
+    X = sliding_window_view(data, (timesteps, data.shape[1]))[:n, 0]
+    y = data[timesteps:, target_col_index]
+    return X, y
 
-def main(target_ticker: str):
+def main(target_ticker: str, batch_size: int = BATCH_SIZE, epochs: int = EPOCHS, learning_rate: float = LEARNING_RATE, cell: str = RNN_CELL):
     """Main function to run the training process."""
+    # TensorFlow, sklearn and the model are imported here so importing this module
+    # (or running --help) doesn't pay their start-up cost
+    import tensorflow as tf
+    from sklearn.model_selection import train_test_split
+    from ml.src.model import build_model # Import our model builder
+    
     # --- Paths ---
     PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
     PROCESSED_DATA_PATH = os.path.join(PROJECT_ROOT, 'ml', 'processed_data', 'historical_features.csv')
     MODEL_OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'ml', 'models')
     os.makedirs(MODEL_OUTPUT_DIR, exist_ok=True)
     
-    # --- Load Data ---
-    df = load_and_preprocess_data(PROCESSED_DATA_PATH)
-    
-    # --- Feature Scaling ---
-    # Scale all features to be between 0 and 1. This is crucial for neural networks.
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(df)
+    # --- Load & Scale Data ---
+    scaled_data, columns, scaler = load_scaled_data(PROCESSED_DATA_PATH)
     
     # --- Create Sequences ---
     target_column_name = f'{target_ticker}_{TARGET_FEATURE}'
-    target_col_index = df.columns.get_loc(target_column_name)
+    target_col_index = columns.index(target_column_name)
     
     X, y = create_sequences(scaled_data, target_col_index, TIMESTEPS)
     
@@ -73,23 +187,56 @@ def main(target_ticker: str):
     X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
     
     # --- Build and Train Model ---
-    model = build_model(input_shape=(X_train.shape[1], X_train.shape[2]))
+    strategy = configure_precision()
+    with strategy.scope():
+        # build_model compiles with XLA; each execution fuses many train steps into one graph
+        model = build_model(
+            input_shape=(X_train.shape[1], X_train.shape[2]),
+            learning_rate=learning_rate,
+            steps_per_execution=STEPS_PER_EXECUTION,
+            cell=cell
+        )
+    
+    # --- Input Pipeline ---
+    # tf.data batches and prefetches on background threads while the previous step trains;
+    # cache() keeps the materialised tensors so later epochs skip the slicing work
+    batch_size = min(batch_size, len(X_train)) # Small datasets train as one full batch
+    train_ds = (
+        tf.data.Dataset.from_tensor_slices((X_train, y_train))
+        .cache()
+        .shuffle(min(len(X_train), 8192))
+        .batch(batch_size)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+    val_ds = tf.data.Dataset.from_tensor_slices((X_val, y_val)).cache().batch(batch_size).prefetch(tf.data.AUTOTUNE)
     
     print("\n" + "="*50)
-    print("train.main: Starting model training...")
+    print(f"train.main: Starting model training (batch_size={batch_size}, epochs={epochs}, lr={learning_rate})...")
     print("="*50 + "\n")
     
+    # Stop once validation loss plateaus instead of always running every epoch; the best
+    # weights are written as they appear and restored at the end
+    model_save_path = os.path.join(MODEL_OUTPUT_DIR, f'rnn_model_{target_ticker.lower()}_v1.h5')
+    checkpoint = tf.keras.callbacks.ModelCheckpoint(model_save_path, monitor='val_loss', save_best_only=True)
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
+        tf.keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=3),
+        checkpoint
+    ]
+    
     history = model.fit(
-        X_train, y_train,
-        epochs=50, # How many times to go over the data
-        batch_size=1, # Process one sequence at a time
-        validation_data=(X_val, y_val),
+        train_ds,
+        epochs=epochs,
+        validation_data=val_ds,
+        callbacks=callbacks,
         verbose=1
     )
     
     # --- Save Model & Scaler ---
-    model_save_path = os.path.join(MODEL_OUTPUT_DIR, f'rnn_model_{target_ticker.lower()}_v1.h5')
-    model.save(model_save_path)
+    # The checkpoint already holds the best model; only save here if val_loss was never finite (e.g. NaN),
+    # judged from the fit history rather than the checkpoint's private state
+    if not np.isfinite(history.history.get('val_loss', [])).any():
+        model.save(model_save_path)
     
     # ADD THESE LINES TO SAVE THE SCALER
     
@@ -107,8 +254,12 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Train RNN model for a specific ticker.")
     parser.add_argument("ticker", type=str, help="The stock ticker to train (e.g., OKLO).")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Mini-batch size (default: {BATCH_SIZE}; was 1).")
+    parser.add_argument("--epochs", type=int, default=EPOCHS, help=f"Number of training epochs (default: {EPOCHS}).")
+    parser.add_argument("--lr", type=float, default=LEARNING_RATE, help=f"Adam learning rate (default: {LEARNING_RATE}).")
+    parser.add_argument("--cell", choices=['lstm', 'gru'], default=RNN_CELL, help=f"Recurrent layer type (default: {RNN_CELL}).")
     args = parser.parse_args()
     
-    main(args.ticker.upper()) # Pass ticker to main
+    main(args.ticker.upper(), batch_size=args.batch_size, epochs=args.epochs, learning_rate=args.lr, cell=args.cell) # Pass ticker to main
 
 # File: ml/scripts/train.py - Character count: 3951
\ No newline at end of file
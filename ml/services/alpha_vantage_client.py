@@ -2,22 +2,42 @@
 # AlphaVantage API client for real-time and intraday stock data collection
 
 import os
+import json
 import time
+import logging
+import threading
+from collections import deque
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 from tenacity import retry, wait_exponential, stop_after_attempt
 
+try:
+    import orjson  # Optional: much faster JSON decoding
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _load_env_once():
+    """Read .env into the process environment the first time a client is created."""
+    load_dotenv()
+
 class AlphaVantageClient:
     """Client for AlphaVantage free stock data API with rate limiting."""
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the AlphaVantage client."""
-        print("alpha_vantage_client.AlphaVantageClient.__init__: Initializing AlphaVantage client")
+    def __init__(self, api_key: Optional[str] = None, use_bulk_quotes: Optional[bool] = None):
+        """Initialize the AlphaVantage client; bulk quotes (premium) are used only when use_bulk_quotes or ALPHA_VANTAGE_BULK_QUOTES=1 enables them."""
+        logger.debug("alpha_vantage_client.AlphaVantageClient.__init__: Initializing AlphaVantage client")
         
-        # Load environment variables
-        load_dotenv()
+        # Load environment variables (the .env file is only read once per process)
+        _load_env_once()
         
         # Use provided key or get from environment
         self.api_key = api_key or os.getenv('ALPHA_VANTAGE_API_KEY')
@@ -26,34 +46,43 @@ class AlphaVantageClient:
             raise ValueError("alpha_vantage_client.AlphaVantageClient.__init__: ALPHA_VANTAGE_API_KEY not found in environment")
         
         self.base_url = "https://www.alphavantage.co/query"
+        # One pooled session keeps the TCP/TLS connection alive between calls
+        self._session = requests.Session()
+        self._session.headers.update({'User-Agent': 'st0c-alpha-vantage-client'})
         
         # Rate limiting: Free tier allows 5 API calls per minute, 500 per day
         self.calls_per_minute = 5
-        self.last_call_times = []
-        
-        print("alpha_vantage_client.AlphaVantageClient.__init__: Client initialized successfully")
+        # Only the newest calls_per_minute timestamps matter; older ones fall off the left
+        self.last_call_times = deque(maxlen=self.calls_per_minute)
+        # Guards last_call_times so concurrent callers share one rate limit
+        self._rate_limit_lock = threading.Lock()
+        # REALTIME_BULK_QUOTES is a premium endpoint, so it is opt-in; when enabled, None until the first bulk call finds out
+        if use_bulk_quotes is None:
+            use_bulk_quotes = os.getenv('ALPHA_VANTAGE_BULK_QUOTES', '') == '1'
+        self.bulk_quotes_available = None if use_bulk_quotes else False
+        self.bulk_quotes_max_symbols = 100
+        
+        logger.debug("alpha_vantage_client.AlphaVantageClient.__init__: Client initialized successfully")
     
     def _enforce_rate_limit(self):
         """Enforce 5 calls per minute rate limit for free tier."""
-        current_time = time.time()
-        
-        # Remove calls older than 1 minute
-        self.last_call_times = [t for t in self.last_call_times if current_time - t < 60]
-        
-        # If we've made 5 calls in the last minute, wait
-        if len(self.last_call_times) >= self.calls_per_minute:
-            wait_time = 60 - (current_time - self.last_call_times[0]) + 1
-            if wait_time > 0:
-                print(f"alpha_vantage_client.AlphaVantageClient._enforce_rate_limit: Rate limit reached, waiting {wait_time:.1f} seconds")
+        with self._rate_limit_lock:
+            current_time = time.time()
+            
+            # If the oldest of the last 5 calls is under a minute old, wait for it to expire
+            if len(self.last_call_times) == self.calls_per_minute and current_time - self.last_call_times[0] < 60:
+                wait_time = 60 - (current_time - self.last_call_times[0]) + 1
+                logger.warning("alpha_vantage_client.AlphaVantageClient._enforce_rate_limit: Rate limit reached, waiting %.1f seconds", wait_time)
                 time.sleep(wait_time)
-        
-        # Record this call
-        self.last_call_times.append(current_time)
+                current_time = time.time()
+            
+            # Record this call (appending to a full deque drops the oldest timestamp)
+            self.last_call_times.append(current_time)
     
     @retry(wait=wait_exponential(multiplier=1, min=4, max=60), stop=stop_after_attempt(3))
     def _make_request(self, params: Dict) -> Dict:
         """Make API request with rate limiting and retry logic."""
-        print(f"alpha_vantage_client.AlphaVantageClient._make_request: Making API call for {params.get('symbol', 'unknown')}")
+        logger.debug("alpha_vantage_client.AlphaVantageClient._make_request: Making API call for %s", params.get('symbol', 'unknown'))
         
         # Enforce rate limiting
         self._enforce_rate_limit()
@@ -62,10 +91,12 @@ class AlphaVantageClient:
         params['apikey'] = self.api_key
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
+            response = self._session.get(self.base_url, params=params, timeout=30)
             response.raise_for_status()
             
-            data = response.json()
+            # Decode the raw body in one C-level pass; response.json() would first guess the
+            # text encoding and build an intermediate str
+            data = _json_loads(response.content)
             
             # Check for API errors
             if "Error Message" in data:
@@ -74,14 +105,14 @@ class AlphaVantageClient:
             if "Note" in data:
                 raise ValueError(f"alpha_vantage_client.AlphaVantageClient._make_request: Rate limit hit: {data['Note']}")
             
-            print(f"alpha_vantage_client.AlphaVantageClient._make_request: API call successful for {params.get('symbol', 'unknown')}")
+            logger.debug("alpha_vantage_client.AlphaVantageClient._make_request: API call successful for %s", params.get('symbol', 'unknown'))
             return data
             
         except requests.exceptions.RequestException as e:
-            print(f"alpha_vantage_client.AlphaVantageClient._make_request: Request failed: {e}")
+            logger.warning("alpha_vantage_client.AlphaVantageClient._make_request: Request failed: %s", e)
             raise
         except Exception as e:
-            print(f"alpha_vantage_client.AlphaVantageClient._make_request: Unexpected error: {e}")
+            logger.warning("alpha_vantage_client.AlphaVantageClient._make_request: Unexpected error: %s", e)
             raise
     
     def get_intraday_data(self, symbol: str, interval: str = "5min") -> Dict:
@@ -95,7 +126,7 @@ class AlphaVantageClient:
         Returns:
             Dict containing intraday data with OHLCV values
         """
-        print(f"alpha_vantage_client.AlphaVantageClient.get_intraday_data: Fetching {interval} data for {symbol}")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_intraday_data: Fetching %s data for %s", interval, symbol)
         
         params = {
             'function': 'TIME_SERIES_INTRADAY',
@@ -122,7 +153,7 @@ class AlphaVantageClient:
             'fetched_at': datetime.now().isoformat()
         }
         
-        print(f"alpha_vantage_client.AlphaVantageClient.get_intraday_data: Successfully fetched data for {symbol}")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_intraday_data: Successfully fetched data for %s", symbol)
         return result
     
     def get_daily_data(self, symbol: str) -> Dict:
@@ -135,7 +166,7 @@ class AlphaVantageClient:
         Returns:
             Dict containing daily OHLCV data
         """
-        print(f"alpha_vantage_client.AlphaVantageClient.get_daily_data: Fetching daily data for {symbol}")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_daily_data: Fetching daily data for %s", symbol)
         
         params = {
             'function': 'TIME_SERIES_DAILY',
@@ -160,7 +191,7 @@ class AlphaVantageClient:
             'fetched_at': datetime.now().isoformat()
         }
         
-        print(f"alpha_vantage_client.AlphaVantageClient.get_daily_data: Successfully fetched daily data for {symbol}")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_daily_data: Successfully fetched daily data for %s", symbol)
         return result
     
     def get_quote(self, symbol: str) -> Dict:
@@ -173,7 +204,7 @@ class AlphaVantageClient:
         Returns:
             Dict containing current quote data
         """
-        print(f"alpha_vantage_client.AlphaVantageClient.get_quote: Fetching quote for {symbol}")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_quote: Fetching quote for %s", symbol)
         
         params = {
             'function': 'GLOBAL_QUOTE',
@@ -201,9 +232,79 @@ class AlphaVantageClient:
             'fetched_at': datetime.now().isoformat()
         }
         
-        print(f"alpha_vantage_client.AlphaVantageClient.get_quote: Successfully fetched quote for {symbol}")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_quote: Successfully fetched quote for %s", symbol)
         return result
     
+    def _get_quote_or_error(self, symbol: str) -> Dict:
+        """Fetch one quote for get_multiple_quotes, returning an error entry instead of raising."""
+        try:
+            return self.get_quote(symbol)
+        except Exception as e:
+            logger.warning("alpha_vantage_client.AlphaVantageClient.get_multiple_quotes: Failed to get quote for %s: %s", symbol, e)
+            return {
+                'symbol': symbol,
+                'error': str(e),
+                'fetched_at': datetime.now().isoformat()
+            }
+    
+    def get_bulk_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Get quotes for up to 100 symbols per API call via REALTIME_BULK_QUOTES.
+        
+        Args:
+            symbols: List of stock symbols
+        
+        Returns:
+            Dict mapping symbol to quote data (same keys as get_quote)
+        
+        Raises:
+            ValueError: If the endpoint is not available on this API key's tier
+        """
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_bulk_quotes: Fetching bulk quotes for %s symbols", len(symbols))
+        
+        results = {}
+        for i in range(0, len(symbols), self.bulk_quotes_max_symbols):
+            chunk = symbols[i:i + self.bulk_quotes_max_symbols]
+            params = {
+                'function': 'REALTIME_BULK_QUOTES',
+                'symbol': ','.join(chunk),
+                'datatype': 'json'
+            }
+            data = self._make_request(params)
+            
+            # Free keys get an informational message instead of a data array
+            if 'data' not in data:
+                self.bulk_quotes_available = False
+                message = data.get('Information') or data.get('message') or 'no data returned'
+                raise ValueError(f"alpha_vantage_client.AlphaVantageClient.get_bulk_quotes: Bulk quotes unavailable: {message}")
+            self.bulk_quotes_available = True
+            
+            fetched_at = datetime.now().isoformat()
+            for quote_data in data['data']:
+                symbol = quote_data.get('symbol', '')
+                results[symbol] = {
+                    'symbol': symbol,
+                    'price': float(quote_data.get('close', 0)),
+                    'change': float(quote_data.get('change', 0)),
+                    'change_percent': str(quote_data.get('change_percent', '0')).replace('%', ''),
+                    'volume': int(float(quote_data.get('volume', 0))),
+                    'latest_trading_day': quote_data.get('timestamp', '')[:10],
+                    'previous_close': float(quote_data.get('previous_close', 0)),
+                    'fetched_at': fetched_at
+                }
+            
+            # Symbols the endpoint skipped get the same error entry a failed get_quote would
+            for symbol in chunk:
+                if symbol not in results:
+                    results[symbol] = {
+                        'symbol': symbol,
+                        'error': 'No quote data returned by bulk endpoint',
+                        'fetched_at': fetched_at
+                    }
+        
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_bulk_quotes: Fetched bulk quotes for %s symbols", len(results))
+        return {symbol: results[symbol] for symbol in symbols}
+    
     def get_multiple_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
         """
         Get quotes for multiple symbols with rate limiting.
@@ -214,36 +315,34 @@ class AlphaVantageClient:
         Returns:
             Dict mapping symbol to quote data
         """
-        print(f"alpha_vantage_client.AlphaVantageClient.get_multiple_quotes: Fetching quotes for {len(symbols)} symbols")
-        
-        results = {}
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_multiple_quotes: Fetching quotes for %s symbols", len(symbols))
         
-        for symbol in symbols:
+        # One bulk call covers up to 100 symbols; skipped unless enabled, and once the tier is known not to allow it
+        if len(symbols) > 1 and self.bulk_quotes_available is not False:
             try:
-                quote_data = self.get_quote(symbol)
-                results[symbol] = quote_data
+                return self.get_bulk_quotes(symbols)
             except Exception as e:
-                print(f"alpha_vantage_client.AlphaVantageClient.get_multiple_quotes: Failed to get quote for {symbol}: {e}")
-                results[symbol] = {
-                    'symbol': symbol,
-                    'error': str(e),
-                    'fetched_at': datetime.now().isoformat()
-                }
+                logger.warning("alpha_vantage_client.AlphaVantageClient.get_multiple_quotes: Falling back to per-symbol quotes: %s", e)
+        
+        # Requests overlap their network round trips; the shared limiter in _make_request
+        # still caps the pool at calls_per_minute
+        with ThreadPoolExecutor(max_workers=max(1, min(self.calls_per_minute, len(symbols)))) as executor:
+            results = dict(zip(symbols, executor.map(self._get_quote_or_error, symbols)))
         
-        print(f"alpha_vantage_client.AlphaVantageClient.get_multiple_quotes: Fetched quotes for {len(results)} symbols")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.get_multiple_quotes: Fetched quotes for %s symbols", len(results))
         return results
     
     def test_connection(self) -> bool:
         """Test the API connection with a simple quote request."""
-        print("alpha_vantage_client.AlphaVantageClient.test_connection: Testing API connection")
+        logger.debug("alpha_vantage_client.AlphaVantageClient.test_connection: Testing API connection")
         
         try:
             # Test with SPY (always active)
             quote = self.get_quote('SPY')
-            print("alpha_vantage_client.AlphaVantageClient.test_connection: ✅ Connection test successful")
+            logger.info("alpha_vantage_client.AlphaVantageClient.test_connection: ✅ Connection test successful")
             return True
         except Exception as e:
-            print(f"alpha_vantage_client.AlphaVantageClient.test_connection: ❌ Connection test failed: {e}")
+            logger.warning("alpha_vantage_client.AlphaVantageClient.test_connection: ❌ Connection test failed: %s", e)
             return False
 
 # File: ml/services/alpha_vantage_client.py - Character count: 8847
\ No newline at end of file
@@ -2,16 +2,38 @@
 # Handles JSON cleaning and parsing for OpenAI responses
 
 import json
+import logging
 import re
 from typing import Dict, Any
 
+try:
+    import orjson  # Optional: much faster JSON decoding
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Common LLM JSON mistakes, matched in a single scan: a trailing comma before a closing
+# bracket, a single-quoted key, or an unquoted key
+_JSON_FIX_RE = re.compile(r",(\s*[}\]])|'([^']*)':|(\w+):")
+
+def _json_fix_replacement(match: re.Match) -> str:
+    """Rewrite one _JSON_FIX_RE match into valid JSON."""
+    closing, quoted_key, bare_key = match.groups()
+    if closing is not None:
+        return closing
+    key = quoted_key if quoted_key is not None else bare_key
+    return f'"{key}":'
+
 class JSONProcessor:
     """Handles cleaning and parsing JSON responses from LLMs."""
     
     @staticmethod
     def clean_llm_response(response_content: str) -> str:
         """Clean markdown formatting and extra text from LLM response to extract pure JSON."""
-        print("json_processor.JSONProcessor.clean_llm_response: Cleaning response content")
+        logger.debug("json_processor.JSONProcessor.clean_llm_response: Cleaning response content")
         
         cleaned = response_content.strip()
         
@@ -28,18 +50,25 @@ class JSONProcessor:
         if '{' in cleaned:
             start = cleaned.find('{')
             
-            # Find the matching closing brace
+            # Find the matching closing brace, jumping brace to brace with str.find
             brace_count = 0
             end = start
+            pos = start
+            next_open = start
+            next_close = cleaned.find('}', start)
             
-            for i, char in enumerate(cleaned[start:], start):
-                if char == '{':
+            while next_close != -1:
+                if next_open != -1 and next_open < next_close:
                     brace_count += 1
-                elif char == '}':
+                    pos = next_open + 1
+                    next_open = cleaned.find('{', pos)
+                else:
                     brace_count -= 1
+                    pos = next_close + 1
                     if brace_count == 0:
-                        end = i + 1
+                        end = pos
                         break
+                    next_close = cleaned.find('}', pos)
             
             # Extract just the JSON object
             cleaned = cleaned[start:end]
@@ -48,59 +77,51 @@ class JSONProcessor:
             cleaned = cleaned.replace('\n', ' ')  # Remove newlines
             cleaned = ' '.join(cleaned.split())   # Normalize whitespace
         
-        print("json_processor.JSONProcessor.clean_llm_response: Response cleaned")
+        logger.debug("json_processor.JSONProcessor.clean_llm_response: Response cleaned")
         return cleaned
     
     @staticmethod
     def parse_json_safely(json_string: str) -> Dict[str, Any]:
         """Parse JSON string with error handling and debugging info."""
-        print("json_processor.JSONProcessor.parse_json_safely: Attempting to parse JSON")
+        logger.debug("json_processor.JSONProcessor.parse_json_safely: Attempting to parse JSON")
         
         try:
-            parsed_data = json.loads(json_string)
-            print("json_processor.JSONProcessor.parse_json_safely: JSON parsed successfully")
+            parsed_data = _json_loads(json_string)
+            logger.debug("json_processor.JSONProcessor.parse_json_safely: JSON parsed successfully")
             return parsed_data
             
         except json.JSONDecodeError as e:
-            print(f"json_processor.JSONProcessor.parse_json_safely: JSON parsing error: {e}")
-            print(f"json_processor.JSONProcessor.parse_json_safely: Problematic JSON (first 200 chars): {json_string[:200]}")
+            logger.warning("json_processor.JSONProcessor.parse_json_safely: JSON parsing error: %s", e)
+            logger.warning("json_processor.JSONProcessor.parse_json_safely: Problematic JSON (first 200 chars): %s", json_string[:200])
             
             # Try to fix common JSON issues
             fixed_json = JSONProcessor._attempt_json_fix(json_string)
             if fixed_json != json_string:
-                print("json_processor.JSONProcessor.parse_json_safely: Attempting to parse fixed JSON")
+                logger.debug("json_processor.JSONProcessor.parse_json_safely: Attempting to parse fixed JSON")
                 try:
-                    parsed_data = json.loads(fixed_json)
-                    print("json_processor.JSONProcessor.parse_json_safely: Fixed JSON parsed successfully")
+                    parsed_data = _json_loads(fixed_json)
+                    logger.debug("json_processor.JSONProcessor.parse_json_safely: Fixed JSON parsed successfully")
                     return parsed_data
                 except json.JSONDecodeError:
-                    print("json_processor.JSONProcessor.parse_json_safely: Fixed JSON still failed to parse")
+                    logger.warning("json_processor.JSONProcessor.parse_json_safely: Fixed JSON still failed to parse")
             
             raise ValueError(f"Could not parse JSON: {e}\nContent: {json_string[:500]}")
     
     @staticmethod
     def _attempt_json_fix(json_string: str) -> str:
         """Attempt to fix common JSON formatting issues."""
-        print("json_processor.JSONProcessor._attempt_json_fix: Attempting to fix JSON issues")
-        
-        fixed = json_string
-        
-        # Fix trailing commas (common LLM issue)
-        fixed = re.sub(r',(\s*[}\]])', r'\1', fixed)
-        
-        # Fix single quotes to double quotes
-        fixed = re.sub(r"'([^']*)':", r'"\1":', fixed)
+        logger.debug("json_processor.JSONProcessor._attempt_json_fix: Attempting to fix JSON issues")
         
-        # Fix unquoted keys
-        fixed = re.sub(r'(\w+):', r'"\1":', fixed)
+        # Fix trailing commas, single-quoted keys and unquoted keys in one pass
+        fixed = _JSON_FIX_RE.sub(_json_fix_replacement, json_string)
         
-        print("json_processor.JSONProcessor._attempt_json_fix: JSON fix attempted")
+        logger.debug("json_processor.JSONProcessor._attempt_json_fix: JSON fix attempted")
         return fixed
 
     @staticmethod
     def clean_and_parse(raw_response: str) -> Dict[str, Any]:
         """Complete workflow: clean LLM response and parse to JSON."""
-        print("json_processor.JSONProcessor.clean_and_parse: Starting complete JSON processing")
+        logger.debug("json_processor.JSONProcessor.clean_and_parse: Starting complete JSON processing")
         
         # Step 1: Clean the response
         cleaned = JSONProcessor.clean_llm_response(raw_response)
@@ -108,7 +129,7 @@ class JSONProcessor:
         # Step 2: Parse the JSON
         parsed = JSONProcessor.parse_json_safely(cleaned)
         
-        print("json_processor.JSONProcessor.clean_and_parse: JSON processing completed successfully")
+        logger.debug("json_processor.JSONProcessor.clean_and_parse: JSON processing completed successfully")
         return parsed
 
 # File: ml/services/json_processor.py - Character count: 3247
\ No newline at end of file
@@ -2,18 +2,47 @@
 # Process intraday CSV data from AlphaVantage into features for RNN training
 
 import os
+import re
+import json
+import logging
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_ds
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+# Intraday files are named by ISO date, e.g. "intraday_2025-09-17.csv"; ISO dates sort and compare as strings
+_INTRADAY_FILE_RE = re.compile(r'^intraday_(\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01]))\.csv$')
+
+# Columns the pipeline reads from each intraday CSV, and their parse types: float32 prices halve
+# the bytes every indicator pass touches, and dictionary-encoded symbols arrive as pandas categoricals
+_INTRADAY_COLUMNS = ['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume']
+_INTRADAY_CONVERT_OPTIONS = pa_csv.ConvertOptions(
+    column_types={
+        'symbol': pa.dictionary(pa.int32(), pa.string()),
+        'open': pa.float32(), 'high': pa.float32(), 'low': pa.float32(), 'close': pa.float32(),
+        'volume': pa.int64()
+    }
+)
+# Files are parsed in parallel, so each individual parse stays single-threaded
+_INTRADAY_READ_OPTIONS = pa_csv.ReadOptions(use_threads=False)
+
 class MarketDataProcessor:
     """Processes raw intraday CSV data into daily technical indicators and features."""
     
-    def __init__(self, intraday_data_dir: str = None):
-        """Initialize the market data processor."""
-        print("market_data_processor.MarketDataProcessor.__init__: Initializing market data processor")
+    def __init__(self, intraday_data_dir: str = None, engine: str = 'pandas'):
+        """Initialize the market data processor; engine 'polars' aggregates the intraday CSVs with polars."""
+        logger.debug("market_data_processor.MarketDataProcessor.__init__: Initializing market data processor")
+        
+        if engine not in ('pandas', 'polars'):
+            raise ValueError(f"market_data_processor.MarketDataProcessor.__init__: Unknown engine '{engine}', expected 'pandas' or 'polars'")
+        self.engine = engine
         
         # Set up paths
         if intraday_data_dir is None:
@@ -24,227 +53,318 @@ class MarketDataProcessor:
             self.intraday_data_dir = intraday_data_dir
             self.processed_data_dir = os.path.join(os.path.dirname(intraday_data_dir), 'ml', 'processed_data')
         
+        # Per-day aggregated OHLCV, cached so unchanged intraday CSVs are not re-parsed
+        self.daily_cache_dir = os.path.join(self.processed_data_dir, 'daily')
+        
         # Ensure processed data directory exists
         os.makedirs(self.processed_data_dir, exist_ok=True)
         
         # Tickers we're tracking (must match intraday_fetcher.py)
         self.tickers = ['OKLO', 'RKLB', 'SPY', 'VIX', 'VIXY', 'VIXM']
         
-        print("market_data_processor.MarketDataProcessor.__init__: Processor initialized successfully")
-    
-    def load_intraday_csv_files(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
-        """Load and combine multiple intraday CSV files into one DataFrame."""
-        print("market_data_processor.MarketDataProcessor.load_intraday_csv_files: Loading CSV files")
+        # Symbols are stored as categorical codes over the ticker list: groupby/pivot work on the
+        # small integer codes and sorting by symbol follows the ticker order
+        self.symbol_dtype = pd.CategoricalDtype(self.tickers)
         
+        logger.debug("market_data_processor.MarketDataProcessor.__init__: Processor initialized successfully")
+    
+    def list_intraday_csv_files(self, start_date: str = None, end_date: str = None) -> List[str]:
+        """List intraday CSV filenames within the optional date range, in chronological order."""
         if not os.path.exists(self.intraday_data_dir):
-            raise ValueError(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: Directory not found: {self.intraday_data_dir}")
-        
-        # Get all CSV files matching intraday pattern
-        csv_files = [f for f in os.listdir(self.intraday_data_dir) if f.startswith('intraday_') and f.endswith('.csv')]
-        
-        if not csv_files:
-            raise ValueError(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: No intraday CSV files found in {self.intraday_data_dir}")
-        
-        # Filter by date range if provided
-        if start_date or end_date:
-            filtered_files = []
-            for filename in csv_files:
-                # Extract date from filename: intraday_2025-09-17.csv
-                try:
-                    date_str = filename.replace('intraday_', '').replace('.csv', '')
-                    file_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    
-                    if start_date:
-                        start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
-                        if file_date < start_dt:
-                            continue
-                    
-                    if end_date:
-                        end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
-                        if file_date > end_dt:
-                            continue
-                    
-                    filtered_files.append(filename)
-                except ValueError:
-                    print(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: Skipping file with invalid date format: {filename}")
-                    continue
-            
-            csv_files = filtered_files
+            raise ValueError(f"market_data_processor.MarketDataProcessor.list_intraday_csv_files: Directory not found: {self.intraday_data_dir}")
+        
+        # Get all CSV files matching intraday pattern, keyed by the date in their name
+        dated_files = {}
+        with os.scandir(self.intraday_data_dir) as entries:
+            for entry in entries:
+                match = _INTRADAY_FILE_RE.match(entry.name)
+                if match and entry.is_file(follow_symlinks=False):
+                    dated_files[entry.name] = match.group(1)
+        
+        if not dated_files:
+            raise ValueError(f"market_data_processor.MarketDataProcessor.list_intraday_csv_files: No intraday CSV files found in {self.intraday_data_dir}")
+        
+        # Filter by date range if provided (plain string comparison, no per-file strptime)
+        csv_files = [
+            filename for filename, date_str in dated_files.items()
+            if (not start_date or date_str >= start_date) and (not end_date or date_str <= end_date)
+        ]
         
         csv_files.sort()  # Ensure chronological order
         
-        print(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: Found {len(csv_files)} CSV files to process")
-        
-        # Load and combine all CSV files
-        all_dataframes = []
-        
-        for filename in csv_files:
-            filepath = os.path.join(self.intraday_data_dir, filename)
-            try:
-                df = pd.read_csv(filepath)
-                
-                # Ensure required columns exist
-                required_columns = ['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume']
-                missing_columns = [col for col in required_columns if col not in df.columns]
-                
-                if missing_columns:
-                    print(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: Skipping {filename} - missing columns: {missing_columns}")
-                    continue
-                
-                all_dataframes.append(df)
-                print(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: Loaded {len(df)} records from {filename}")
-                
-            except Exception as e:
-                print(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: Error loading {filename}: {e}")
-                continue
-        
-        if not all_dataframes:
+        return csv_files
+    
+    def load_intraday_csv_files(self, start_date: str = None, end_date: str = None, filenames: List[str] = None) -> pd.DataFrame:
+        """Load and combine multiple intraday CSV files into one DataFrame (all files in the date range unless filenames is given)."""
+        logger.debug("market_data_processor.MarketDataProcessor.load_intraday_csv_files: Loading CSV files")
+        
+        csv_files = filenames if filenames is not None else self.list_intraday_csv_files(start_date, end_date)
+        
+        logger.debug("market_data_processor.MarketDataProcessor.load_intraday_csv_files: Found %s CSV files to process", len(csv_files))
+        
+        # Parse the files concurrently (Arrow releases the GIL while parsing), keeping file order
+        with ThreadPoolExecutor(max_workers=max(1, min(os.cpu_count() or 1, len(csv_files)))) as executor:
+            all_tables = [table for table in executor.map(self._load_one, csv_files) if table is not None]
+        
+        if not all_tables:
             raise ValueError("market_data_processor.MarketDataProcessor.load_intraday_csv_files: No valid CSV files could be loaded")
         
-        # Combine all dataframes
-        combined_df = pd.concat(all_dataframes, ignore_index=True)
+        # Combine all tables: Arrow concatenation only links the chunks, then one conversion to pandas.
+        # Each column goes straight into its own block and its Arrow buffers are released as it is
+        # converted, so the Arrow and pandas copies never coexist in full
+        combined_table = pa.concat_tables(all_tables, promote_options='permissive')
+        del all_tables
+        combined_df = combined_table.to_pandas(split_blocks=True, self_destruct=True)
+        del combined_table
         
         # Convert timestamp to datetime
         combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'])
         
+        # Untracked symbols become NaN here and drop out of the daily aggregation
+        combined_df['symbol'] = combined_df['symbol'].astype(self.symbol_dtype)
+        
         # Sort by timestamp and symbol
         combined_df.sort_values(['symbol', 'timestamp'], inplace=True)
         combined_df.reset_index(drop=True, inplace=True)
         
-        print(f"market_data_processor.MarketDataProcessor.load_intraday_csv_files: Combined {len(combined_df)} total records")
+        logger.debug("market_data_processor.MarketDataProcessor.load_intraday_csv_files: Combined %s total records", len(combined_df))
         return combined_df
     
-    def aggregate_to_daily(self, intraday_df: pd.DataFrame) -> pd.DataFrame:
-        """Aggregate intraday data to daily OHLCV data."""
-        print("market_data_processor.MarketDataProcessor.aggregate_to_daily: Aggregating to daily data")
-        
-        # Create date column from timestamp
-        intraday_df['date'] = intraday_df['timestamp'].dt.date
-        
-        # Aggregate by symbol and date
-        daily_data = []
-        
-        for symbol in self.tickers:
-            symbol_data = intraday_df[intraday_df['symbol'] == symbol].copy()
+    def _load_one(self, filename: str) -> Optional[pa.Table]:
+        """Read the pipeline's columns from one intraday CSV, or None if it is unreadable or incomplete."""
+        filepath = os.path.join(self.intraday_data_dir, filename)
+        try:
+            table = pa_csv.read_csv(filepath, read_options=_INTRADAY_READ_OPTIONS, convert_options=_INTRADAY_CONVERT_OPTIONS)
             
-            if symbol_data.empty:
-                print(f"market_data_processor.MarketDataProcessor.aggregate_to_daily: No data found for {symbol}")
-                continue
+            # Ensure required columns exist
+            missing_columns = [col for col in _INTRADAY_COLUMNS if col not in table.column_names]
             
-            # Group by date and aggregate
-            daily_agg = symbol_data.groupby('date').agg({
-                'open': 'first',    # First open of the day
-                'high': 'max',      # Highest high of the day
-                'low': 'min',       # Lowest low of the day
-                'close': 'last',    # Last close of the day
-                'volume': 'sum'     # Total volume for the day
-            }).reset_index()
+            if missing_columns:
+                logger.warning("market_data_processor.MarketDataProcessor._load_one: Skipping %s - missing columns: %s", filename, missing_columns)
+                return None
             
-            # Add symbol column
-            daily_agg['symbol'] = symbol
+            logger.debug("market_data_processor.MarketDataProcessor._load_one: Loaded %s records from %s", table.num_rows, filename)
+            return table.select(_INTRADAY_COLUMNS)
             
-            daily_data.append(daily_agg)
-            print(f"market_data_processor.MarketDataProcessor.aggregate_to_daily: Aggregated {len(daily_agg)} days for {symbol}")
+        except Exception as e:
+            logger.warning("market_data_processor.MarketDataProcessor._load_one: Error loading %s: %s", filename, e)
+            return None
+    
+    def load_daily_data(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """Daily OHLCV for every intraday CSV in range, re-aggregating only files newer than their cached day."""
+        logger.debug("market_data_processor.MarketDataProcessor.load_daily_data: Loading daily data")
+        
+        os.makedirs(self.daily_cache_dir, exist_ok=True)
+        
+        # A day's cache is valid while it is at least as new as its source CSV
+        cached_paths = []
+        stale_files = []
+        for filename in self.list_intraday_csv_files(start_date, end_date):
+            date_str = filename[len('intraday_'):-len('.csv')]
+            cache_path = os.path.join(self.daily_cache_dir, f'{date_str}.parquet')
+            csv_path = os.path.join(self.intraday_data_dir, filename)
+            if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(csv_path):
+                cached_paths.append(cache_path)
+            else:
+                stale_files.append(filename)
         
-        if not daily_data:
-            raise ValueError("market_data_processor.MarketDataProcessor.aggregate_to_daily: No daily data could be aggregated")
+        logger.debug("market_data_processor.MarketDataProcessor.load_daily_data: %s days cached, %s to process", len(cached_paths), len(stale_files))
         
-        # Combine all symbols
-        daily_df = pd.concat(daily_data, ignore_index=True)
+        daily_frames = []
+        if cached_paths:
+            daily_frames.append(pa_ds.dataset(cached_paths, format='parquet').to_table().to_pandas())
         
-        # Convert date back to datetime for easier processing
-        daily_df['date'] = pd.to_datetime(daily_df['date'])
+        if stale_files:
+            if self.engine == 'polars':
+                new_daily_df = self.aggregate_to_daily_polars(stale_files)
+            else:
+                new_daily_df = self.aggregate_to_daily(self.load_intraday_csv_files(filenames=stale_files))
+            
+            # Write one Parquet file per aggregated day so later runs only touch changed days
+            for date, day_df in new_daily_df.groupby('date', sort=False):
+                cache_path = os.path.join(self.daily_cache_dir, f"{date.strftime('%Y-%m-%d')}.parquet")
+                day_df.to_parquet(cache_path, index=False, compression='zstd')
+            daily_frames.append(new_daily_df)
         
-        # Sort by date and symbol
+        if not daily_frames:
+            raise ValueError(f"market_data_processor.MarketDataProcessor.load_daily_data: No intraday CSV files found in {self.intraday_data_dir}")
+        
+        daily_df = pd.concat(daily_frames, ignore_index=True)
+        daily_df['symbol'] = daily_df['symbol'].astype(self.symbol_dtype)
         daily_df.sort_values(['symbol', 'date'], inplace=True)
         daily_df.reset_index(drop=True, inplace=True)
         
-        print(f"market_data_processor.MarketDataProcessor.aggregate_to_daily: Created {len(daily_df)} daily records")
+        logger.debug("market_data_processor.MarketDataProcessor.load_daily_data: Loaded %s daily records", len(daily_df))
         return daily_df
     
-    def calculate_technical_indicators(self, daily_df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate technical indicators for each symbol."""
-        print("market_data_processor.MarketDataProcessor.calculate_technical_indicators: Calculating technical indicators")
+    def aggregate_to_daily(self, intraday_df: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate intraday data to daily OHLCV data."""
+        logger.debug("market_data_processor.MarketDataProcessor.aggregate_to_daily: Aggregating to daily data")
+        
+        # Keep only the tracked tickers, then aggregate every symbol/day in one grouped pass
+        tracked_df = intraday_df[intraday_df['symbol'].isin(self.tickers)]
         
-        enhanced_data = []
+        if tracked_df.empty:
+            raise ValueError("market_data_processor.MarketDataProcessor.aggregate_to_daily: No daily data could be aggregated")
         
+        daily_df = tracked_df.groupby(
+            [tracked_df['symbol'].astype(self.symbol_dtype), tracked_df['timestamp'].dt.floor('D').rename('date')],
+            sort=False, observed=True
+        ).agg(
+            open=('open', 'first'),     # First open of the day
+            high=('high', 'max'),       # Highest high of the day
+            low=('low', 'min'),         # Lowest low of the day
+            close=('close', 'last'),    # Last close of the day
+            volume=('volume', 'sum')    # Total volume for the day
+        ).reset_index()
+        
+        days_per_symbol = daily_df['symbol'].value_counts()
         for symbol in self.tickers:
-            symbol_data = daily_df[daily_df['symbol'] == symbol].copy()
-            
-            if symbol_data.empty:
-                continue
-            
-            # Sort by date to ensure correct order
-            symbol_data.sort_values('date', inplace=True)
-            
-            # Basic price features
-            symbol_data['daily_return'] = symbol_data['close'].pct_change()
-            symbol_data['daily_high_low_pct'] = ((symbol_data['high'] - symbol_data['low']) / symbol_data['close']) * 100
-            symbol_data['daily_open_close_pct'] = ((symbol_data['close'] - symbol_data['open']) / symbol_data['open']) * 100
-            
-            # Moving averages (if we have enough data)
-            if len(symbol_data) >= 5:
-                symbol_data['ma_5'] = symbol_data['close'].rolling(window=5, min_periods=1).mean()
-                symbol_data['ma_5_ratio'] = symbol_data['close'] / symbol_data['ma_5']
+            if days_per_symbol.get(symbol, 0):
+                logger.debug("market_data_processor.MarketDataProcessor.aggregate_to_daily: Aggregated %s days for %s", days_per_symbol[symbol], symbol)
             else:
-                symbol_data['ma_5'] = symbol_data['close']
-                symbol_data['ma_5_ratio'] = 1.0
-            
-            if len(symbol_data) >= 10:
-                symbol_data['ma_10'] = symbol_data['close'].rolling(window=10, min_periods=1).mean()
-                symbol_data['ma_10_ratio'] = symbol_data['close'] / symbol_data['ma_10']
-            else:
-                symbol_data['ma_10'] = symbol_data['close']
-                symbol_data['ma_10_ratio'] = 1.0
-            
-            # Volatility indicators
-            symbol_data['price_volatility_5d'] = symbol_data['daily_return'].rolling(window=5, min_periods=1).std()
-            symbol_data['volume_ma_5'] = symbol_data['volume'].rolling(window=5, min_periods=1).mean()
-            symbol_data['volume_ratio'] = symbol_data['volume'] / symbol_data['volume_ma_5']
-            
-            # RSI (if we have enough data)
-            if len(symbol_data) >= 14:
-                symbol_data['rsi'] = self.calculate_rsi(symbol_data['close'], period=14)
-            else:
-                symbol_data['rsi'] = 50.0  # Neutral RSI for insufficient data
-            
-            # Price momentum
-            if len(symbol_data) >= 3:
-                symbol_data['momentum_3d'] = ((symbol_data['close'] / symbol_data['close'].shift(2)) - 1) * 100
-            else:
-                symbol_data['momentum_3d'] = 0.0
-            
-            enhanced_data.append(symbol_data)
-            print(f"market_data_processor.MarketDataProcessor.calculate_technical_indicators: Calculated indicators for {symbol}")
+                logger.warning("market_data_processor.MarketDataProcessor.aggregate_to_daily: No data found for %s", symbol)
         
-        if not enhanced_data:
-            raise ValueError("market_data_processor.MarketDataProcessor.calculate_technical_indicators: No technical indicators could be calculated")
+        # Sort by date and symbol
+        daily_df.sort_values(['symbol', 'date'], inplace=True)
+        daily_df.reset_index(drop=True, inplace=True)
         
-        # Combine all symbols
-        enhanced_df = pd.concat(enhanced_data, ignore_index=True)
+        logger.debug("market_data_processor.MarketDataProcessor.aggregate_to_daily: Created %s daily records", len(daily_df))
+        return daily_df
+    
+    def aggregate_to_daily_polars(self, filenames: List[str]) -> pd.DataFrame:
+        """Same daily OHLCV as aggregate_to_daily, built with one lazy polars scan over the given intraday CSVs."""
+        logger.debug("market_data_processor.MarketDataProcessor.aggregate_to_daily_polars: Aggregating %s files to daily data", len(filenames))
         
-        # Fill any remaining NaN values
-        enhanced_df.fillna(method='ffill', inplace=True)
-        enhanced_df.fillna(method='bfill', inplace=True)
-        enhanced_df.fillna(0, inplace=True)
+        # polars is optional: only the 'polars' engine needs it
+        try:
+            import polars as pl
+        except ImportError:
+            raise ValueError("market_data_processor.MarketDataProcessor.aggregate_to_daily_polars: The polars engine requires the polars package (pip install polars)")
+        
+        # Read, filter, bucket by day and aggregate as one query plan, executed in parallel by a single collect()
+        lazy_df = pl.scan_csv(
+            [os.path.join(self.intraday_data_dir, filename) for filename in filenames],
+            schema_overrides={
+                'timestamp': pl.Utf8, 'symbol': pl.Utf8,
+                'open': pl.Float32, 'high': pl.Float32, 'low': pl.Float32, 'close': pl.Float32,
+                'volume': pl.Int64
+            }
+        )
+        daily = (
+            lazy_df
+            .select(_INTRADAY_COLUMNS)
+            .filter(pl.col('symbol').is_in(self.tickers))
+            .with_columns(pl.col('timestamp').str.to_datetime())
+            .group_by('symbol', pl.col('timestamp').dt.truncate('1d').alias('date'))
+            .agg(
+                pl.col('open').sort_by('timestamp').first(),     # First open of the day
+                pl.col('high').max(),                            # Highest high of the day
+                pl.col('low').min(),                             # Lowest low of the day
+                pl.col('close').sort_by('timestamp').last(),     # Last close of the day
+                pl.col('volume').sum()                           # Total volume for the day
+            )
+            .collect()
+        )
+        
+        if daily.height == 0:
+            raise ValueError("market_data_processor.MarketDataProcessor.aggregate_to_daily_polars: No daily data could be aggregated")
+        
+        daily_df = daily.to_pandas()
+        daily_df['symbol'] = daily_df['symbol'].astype(self.symbol_dtype)
+        daily_df.sort_values(['symbol', 'date'], inplace=True)
+        daily_df.reset_index(drop=True, inplace=True)
         
-        print(f"market_data_processor.MarketDataProcessor.calculate_technical_indicators: Technical indicators calculated for {len(enhanced_df)} records")
+        logger.debug("market_data_processor.MarketDataProcessor.aggregate_to_daily_polars: Created %s daily records", len(daily_df))
+        return daily_df
+    
+    def calculate_technical_indicators(self, daily_df: pd.DataFrame) -> pd.DataFrame:
+        """Calculate technical indicators for each symbol."""
+        logger.debug("market_data_processor.MarketDataProcessor.calculate_technical_indicators: Calculating technical indicators")
+        
+        # One frame holding every tracked symbol, ordered by the ticker list and then by date
+        enhanced_df = daily_df[daily_df['symbol'].isin(self.tickers)].copy()
+        
+        if enhanced_df.empty:
+            raise ValueError("market_data_processor.MarketDataProcessor.calculate_technical_indicators: No technical indicators could be calculated")
+        
+        enhanced_df['symbol'] = enhanced_df['symbol'].astype(self.symbol_dtype)
+        enhanced_df = enhanced_df.sort_values(['symbol', 'date']).reset_index(drop=True)
+        
+        # Every indicator below is computed per symbol in one grouped pass over the whole column
+        symbols = enhanced_df['symbol']
+        close = enhanced_df['close']
+        close_by_symbol = close.groupby(symbols, sort=False, observed=True)
+        n_days = close_by_symbol.transform('size')
+        
+        # Basic price features
+        enhanced_df['daily_return'] = close_by_symbol.pct_change()
+        enhanced_df['daily_high_low_pct'] = ((enhanced_df['high'] - enhanced_df['low']) / close) * 100
+        enhanced_df['daily_open_close_pct'] = ((close - enhanced_df['open']) / enhanced_df['open']) * 100
+        
+        # Moving averages (symbols without enough data fall back to the close itself)
+        for window in (5, 10):
+            enough_data = n_days >= window
+            rolling_mean = close_by_symbol.rolling(window=window, min_periods=1).mean().droplevel(0)
+            enhanced_df[f'ma_{window}'] = rolling_mean.where(enough_data, close)
+            enhanced_df[f'ma_{window}_ratio'] = (close / rolling_mean).where(enough_data, 1.0)
+        
+        # Volatility indicators
+        enhanced_df['price_volatility_5d'] = (
+            enhanced_df['daily_return'].groupby(symbols, sort=False, observed=True).rolling(window=5, min_periods=1).std().droplevel(0)
+        )
+        volume = enhanced_df['volume']
+        enhanced_df['volume_ma_5'] = volume.groupby(symbols, sort=False, observed=True).rolling(window=5, min_periods=1).mean().droplevel(0)
+        enhanced_df['volume_ratio'] = volume / enhanced_df['volume_ma_5']
+        
+        # RSI (neutral 50 for symbols with insufficient data and for each symbol's warm-up rows)
+        rsi = close_by_symbol.transform(lambda prices: self.calculate_rsi(prices, period=14))
+        enhanced_df['rsi'] = rsi.where(n_days >= 14, 50.0).fillna(50.0)
+        
+        # Price momentum
+        momentum = ((close / close_by_symbol.shift(2)) - 1) * 100
+        enhanced_df['momentum_3d'] = momentum.where(n_days >= 3, 0.0)
+        
+        for symbol in symbols.unique():
+            logger.debug("market_data_processor.MarketDataProcessor.calculate_technical_indicators: Calculated indicators for %s", symbol)
+        
+        # The only NaNs left are each symbol's warm-up rows (no previous close for the return,
+        # a single return for the volatility, under 3 days for momentum) or 0/0 ratios; these
+        # are zero, not the previous ticker's values a frame-wide ffill/bfill would carry over
+        indicator_columns = [
+            'daily_return', 'daily_high_low_pct', 'daily_open_close_pct', 'ma_5_ratio', 'ma_10_ratio',
+            'price_volatility_5d', 'volume_ratio', 'momentum_3d'
+        ]
+        enhanced_df[indicator_columns] = enhanced_df[indicator_columns].fillna(0)
+        
+        logger.debug("market_data_processor.MarketDataProcessor.calculate_technical_indicators: Technical indicators calculated for %s records", len(enhanced_df))
         return enhanced_df
     
     def calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calculate RSI (Relative Strength Index)."""
+        """Calculate RSI (Relative Strength Index) with Wilder's smoothing; NaN for the first `period` rows."""
         delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period, min_periods=1).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period, min_periods=1).mean()
+        gain = self._wilder_average(delta.clip(lower=0), period)
+        loss = self._wilder_average(-delta.clip(upper=0), period)
         
         rs = gain / loss
         rsi = 100 - (100 / (1 + rs))
         
         return rsi
     
+    @staticmethod
+    def _wilder_average(changes: pd.Series, period: int) -> pd.Series:
+        """Wilder's running average: seeded with the mean of the first `period` changes, then avg = (avg * (period - 1) + x) / period."""
+        seeded = pd.Series(np.nan, index=changes.index)
+        if len(changes) > period:
+            # changes[0] is the NaN from diff(), so the seed covers positions 1..period
+            seeded.iloc[period] = changes.iloc[1:period + 1].mean()
+            seeded.iloc[period + 1:] = changes.iloc[period + 1:]
+        # Wilder's recursion is an exponential average with alpha = 1 / period, run in pandas' C loop
+        return seeded.ewm(alpha=1 / period, adjust=False).mean()
+    
     def pivot_to_wide_format(self, enhanced_df: pd.DataFrame) -> pd.DataFrame:
         """Convert from long format (symbol per row) to wide format (features as columns)."""
-        print("market_data_processor.MarketDataProcessor.pivot_to_wide_format: Converting to wide format")
+        logger.debug("market_data_processor.MarketDataProcessor.pivot_to_wide_format: Converting to wide format")
         
         # Features to include in the wide format
         feature_columns = [
@@ -257,44 +377,31 @@ class MarketDataProcessor:
         for col in feature_columns:
             if col not in enhanced_df.columns:
                 enhanced_df[col] = 0.0
-                print(f"market_data_processor.MarketDataProcessor.pivot_to_wide_format: Added missing column {col} with default value 0.0")
+                logger.warning("market_data_processor.MarketDataProcessor.pivot_to_wide_format: Added missing column %s with default value 0.0", col)
         
-        # Pivot the data
-        wide_data_frames = []
+        # Pivot every feature in one reshape; columns come back as (feature, symbol) pairs, with
+        # symbols as plain strings so they keep their alphabetical column order
+        wide_df = enhanced_df.astype({'symbol': str}).pivot(index='date', columns='symbol', values=feature_columns)
         
-        for feature in feature_columns:
-            # Pivot each feature separately
-            pivot_df = enhanced_df.pivot(index='date', columns='symbol', values=feature)
-            
-            # Rename columns to include feature name
-            pivot_df.columns = [f"{col}_{feature}" for col in pivot_df.columns]
-            
-            wide_data_frames.append(pivot_df)
-        
-        # Combine all features
-        wide_df = pd.concat(wide_data_frames, axis=1)
+        # Rename columns to include feature name
+        wide_df.columns = [f"{symbol}_{feature}" for feature, symbol in wide_df.columns.to_flat_index()]
         
         # Fill missing values (in case some symbols have missing days)
-        wide_df.fillna(method='ffill', inplace=True)
-        wide_df.fillna(method='bfill', inplace=True)
-        wide_df.fillna(0, inplace=True)
+        wide_df = wide_df.ffill().bfill().fillna(0)
         
         # Reset index to make date a column
         wide_df.reset_index(inplace=True)
         
-        print(f"market_data_processor.MarketDataProcessor.pivot_to_wide_format: Created wide format with {len(wide_df)} rows and {len(wide_df.columns)} columns")
+        logger.debug("market_data_processor.MarketDataProcessor.pivot_to_wide_format: Created wide format with %s rows and %s columns", len(wide_df), len(wide_df.columns))
         return wide_df
     
     def process_intraday_to_features(self, start_date: str = None, end_date: str = None, output_filename: str = None) -> str:
         """Complete processing pipeline: load intraday data -> daily aggregation -> technical indicators -> wide format."""
-        print("market_data_processor.MarketDataProcessor.process_intraday_to_features: Starting complete processing pipeline")
+        logger.debug("market_data_processor.MarketDataProcessor.process_intraday_to_features: Starting complete processing pipeline")
         
         try:
-            # Step 1: Load intraday CSV files
-            intraday_df = self.load_intraday_csv_files(start_date, end_date)
-            
-            # Step 2: Aggregate to daily
-            daily_df = self.aggregate_to_daily(intraday_df)
+            # Steps 1-2: Load intraday CSV files and aggregate to daily (cached per day)
+            daily_df = self.load_daily_data(start_date, end_date)
             
             # Step 3: Calculate technical indicators
             enhanced_df = self.calculate_technical_indicators(daily_df)
@@ -309,55 +416,78 @@ class MarketDataProcessor:
             output_path = os.path.join(self.processed_data_dir, output_filename)
             wide_df.to_csv(output_path, index=False)
             
-            print(f"market_data_processor.MarketDataProcessor.process_intraday_to_features: ✅ SUCCESS - Processed {len(wide_df)} days of market data")
-            print(f"market_data_processor.MarketDataProcessor.process_intraday_to_features: Features saved to {output_path}")
+            # Parquet sibling for fast typed reloads
+            wide_df.to_parquet(os.path.splitext(output_path)[0] + '.parquet', index=False, compression='zstd')
+            
+            # Raw float32 feature matrix for np.load(..., mmap_mode='r'), with its columns and
+            # dates in a JSON sidecar; the .json is written last so its presence marks a complete pair
+            self.save_feature_matrix(wide_df, os.path.splitext(output_path)[0])
+            
+            # One summary line per run; the per-file and per-symbol detail above is DEBUG
+            logger.info(
+                "market_data_processor.MarketDataProcessor.process_intraday_to_features: ✅ SUCCESS - Processed %s days of market data (%s daily records), features saved to %s",
+                len(wide_df), len(daily_df), output_path
+            )
             
             return output_path
             
         except Exception as e:
-            print(f"market_data_processor.MarketDataProcessor.process_intraday_to_features: ❌ ERROR - {str(e)}")
+            logger.error("market_data_processor.MarketDataProcessor.process_intraday_to_features: ❌ ERROR - %s", e)
             raise
     
+    def save_feature_matrix(self, wide_df: pd.DataFrame, output_stem: str) -> str:
+        """Save the wide features as a C-contiguous float32 .npy plus a .json of columns and dates; returns the .npy path."""
+        npy_path = output_stem + '.npy'
+        feature_df = wide_df.drop(columns=['date'])
+        np.save(npy_path, np.ascontiguousarray(feature_df.to_numpy(dtype=np.float32)))
+        
+        with open(output_stem + '.json', 'w') as f:
+            json.dump({
+                'columns': list(feature_df.columns),
+                'dates': wide_df['date'].dt.strftime('%Y-%m-%d').tolist()
+            }, f)
+        
+        logger.debug("market_data_processor.MarketDataProcessor.save_feature_matrix: Saved %s float32 matrix to %s", feature_df.shape, npy_path)
+        return npy_path
+    
     def get_available_date_range(self) -> tuple:
         """Get the date range of available intraday data."""
-        print("market_data_processor.MarketDataProcessor.get_available_date_range: Checking available date range")
+        logger.debug("market_data_processor.MarketDataProcessor.get_available_date_range: Checking available date range")
         
         try:
-            csv_files = [f for f in os.listdir(self.intraday_data_dir) if f.startswith('intraday_') and f.endswith('.csv')]
-            
-            if not csv_files:
-                return None, None
-            
             dates = []
-            for filename in csv_files:
-                try:
-                    date_str = filename.replace('intraday_', '').replace('.csv', '')
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    dates.append(date_obj)
-                except ValueError:
-                    continue
+            with os.scandir(self.intraday_data_dir) as entries:
+                for entry in entries:
+                    match = _INTRADAY_FILE_RE.match(entry.name)
+                    if match and entry.is_file(follow_symlinks=False):
+                        dates.append(match.group(1))
             
             if not dates:
                 return None, None
             
-            dates.sort()
-            start_date = dates[0].strftime('%Y-%m-%d')
-            end_date = dates[-1].strftime('%Y-%m-%d')
+            start_date = min(dates)
+            end_date = max(dates)
             
-            print(f"market_data_processor.MarketDataProcessor.get_available_date_range: Available data from {start_date} to {end_date}")
+            logger.debug("market_data_processor.MarketDataProcessor.get_available_date_range: Available data from %s to %s", start_date, end_date)
             return start_date, end_date
             
         except Exception as e:
-            print(f"market_data_processor.MarketDataProcessor.get_available_date_range: Error checking date range: {e}")
+            logger.warning("market_data_processor.MarketDataProcessor.get_available_date_range: Error checking date range: %s", e)
             return None, None
 
 def main():
     """Example usage of the MarketDataProcessor."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Process intraday CSV data into daily features.")
+    parser.add_argument("--engine", choices=['pandas', 'polars'], default='pandas', help="Engine for the intraday-to-daily aggregation (default: pandas).")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     print(f"market_data_processor.main: Starting market data processing at {datetime.now()}")
     
     try:
         # Create processor
-        processor = MarketDataProcessor()
+        processor = MarketDataProcessor(engine=args.engine)
         
         # Check available data range
         start_date, end_date = processor.get_available_date_range()
@@ -2,20 +2,86 @@
 # Simple OpenAI API client wrapper - handles only API calls
 
 import os
-from typing import Optional
-from dotenv import load_dotenv
-from openai import OpenAI
-from tenacity import retry, wait_exponential, stop_after_attempt
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Optional
+from functools import lru_cache
+from tenacity import retry, retry_if_exception, wait_exponential, wait_exponential_jitter, stop_after_attempt
+
+try:
+    import orjson  # Optional: much faster JSON encoding/decoding
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _load_env_once():
+    """Read .env into the process environment the first time a client is created."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def _is_retryable(error: BaseException) -> bool:
+    """Retry timeouts, conflicts, rate limits, server errors and dropped connections; other 4xx errors fail the same way every time."""
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code in (408, 409, 429) or status_code >= 500
+    # No HTTP status: only connection and timeout errors raised by the SDK or httpx are transient
+    return type(error).__module__.split('.')[0] in ('openai', 'httpx')
+
+def run_async(coro):
+    """asyncio.run on uvloop's faster event loop when it is installed, the default loop otherwise."""
+    try:
+        import uvloop  # Optional: lower per-await overhead for network-bound batches (not on Windows)
+    except ImportError:
+        return asyncio.run(coro)
+    return uvloop.run(coro)
+
+@lru_cache(maxsize=None)
+def _token_encoding(model: str):
+    """tiktoken encoding for the model, or None when tiktoken is not installed."""
+    try:
+        import tiktoken  # Optional: exact local token counts for the rate limiter
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+
+@lru_cache(maxsize=None)
+def _shared_api_clients(api_key: str) -> tuple:
+    """One (OpenAI, AsyncOpenAI) pair per API key, so every OpenAIClient reuses the same connection pools."""
+    # The SDK (with httpx, pydantic and anyio) is imported on first use, not when this module is
+    # imported, so scripts that only import it (or run --help) skip several hundred ms of start-up
+    import httpx
+    from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+    
+    # Keep idle sockets for 30s so back-to-back and concurrent calls reuse warm TLS connections;
+    # the Default*HttpxClient classes keep the SDK's own timeout and redirect settings
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
+    return (
+        OpenAI(api_key=api_key, http_client=DefaultHttpxClient(limits=limits)),
+        AsyncOpenAI(api_key=api_key, http_client=DefaultAsyncHttpxClient(limits=limits))
+    )
 
 class OpenAIClient:
     """Simple wrapper around OpenAI API for making chat completion calls."""
     
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the OpenAI client."""
-        print("openai_client.OpenAIClient.__init__: Initializing OpenAI client")
+        logger.debug("openai_client.OpenAIClient.__init__: Initializing OpenAI client")
         
-        # Load environment variables
-        load_dotenv()
+        # Load environment variables (the .env file is only read once per process)
+        _load_env_once()
         
         # Use provided key or get from environment
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
@@ -23,59 +89,316 @@ class OpenAIClient:
         if not self.api_key:
             raise ValueError("openai_client.OpenAIClient.__init__: OPENAI_API_KEY not found in environment or parameters")
         
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=self.api_key)
+        # Initialize OpenAI client (shared: later instances skip the DNS/TCP/TLS setup of a fresh pool)
+        self.client, self.async_client = _shared_api_clients(self.api_key)
         self.model = "gpt-4o"  # Responses API requires gpt-4o or better
         
-        print("openai_client.OpenAIClient.__init__: Client initialized successfully")
+        # Content-addressed response cache: identical requests are answered from disk, not re-billed.
+        # Opt-in (OPENAI_CACHE_ENABLE=1), since a cached web search replays old results instead of searching again
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        self.cache_dir = Path(os.getenv('OPENAI_CACHE_DIR', os.path.join(project_root, '.openai_cache')))
+        self.cache_enabled = os.getenv('OPENAI_CACHE_ENABLE', '') == '1'
+        
+        # Client-side request and token throttles (0 = off): pacing below the account's RPM/TPM
+        # avoids 429s, each of which costs a full round trip plus a retry back-off
+        self.requests_per_minute = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '0'))
+        self.tokens_per_minute = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '0'))
+        self._request_log = deque()  # (send time, estimated tokens) of requests in the last minute
+        self._rate_limit_lock = threading.Lock()
+        
+        logger.debug("openai_client.OpenAIClient.__init__: Client initialized successfully")
+    
+    def _estimate_tokens(self, text: str) -> int:
+        """Prompt tokens for text: exact with tiktoken, otherwise the usual ~4 characters per token."""
+        encoding = _token_encoding(self.model)
+        if encoding is None:
+            return len(text) // 4 + 1
+        return len(encoding.encode(text))
     
-    def responses_with_web_search(self, input_text: str, temperature: float = 0.1) -> str:
-        """Make a Responses API call with web search capability."""
-        print("openai_client.OpenAIClient.responses_with_web_search: Making Responses API call with web search")
+    def _estimate_chat_tokens(self, messages: list, max_tokens: int = None) -> int:
+        """Tokens a chat request counts against TPM: its message contents plus the output cap, if any."""
+        prompt_tokens = sum(self._estimate_tokens(str(message.get('content') or '')) for message in messages)
+        return prompt_tokens + (max_tokens or 0)
+    
+    def _reserve_request_slot(self, tokens: int = 0) -> float:
+        """Book the next request within the per-minute limits; returns how many seconds to wait before sending it."""
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return 0.0
+        
+        with self._rate_limit_lock:
+            now = time.time()
+            while self._request_log and self._request_log[0][0] <= now - 60:
+                self._request_log.popleft()
+            
+            # Requests go out in booking order; while the minute before send_at is over either
+            # budget, move send_at to when its oldest booking leaves the window
+            send_at = max(now, self._request_log[-1][0]) if self._request_log else now
+            while True:
+                in_window = [(sent, used) for sent, used in self._request_log if sent > send_at - 60]
+                over_requests = self.requests_per_minute and len(in_window) >= self.requests_per_minute
+                over_tokens = self.tokens_per_minute and in_window and sum(used for _, used in in_window) + tokens > self.tokens_per_minute
+                if not (over_requests or over_tokens):
+                    break
+                send_at = in_window[0][0] + 60
+            self._request_log.append((send_at, tokens))
         
+        if send_at > now:
+            logger.debug("openai_client.OpenAIClient._reserve_request_slot: Rate limit reached, waiting %.1f seconds", send_at - now)
+        return send_at - now
+    
+    def _cache_path(self, kind: str, **request) -> Optional[Path]:
+        """Cache file for a request, keyed by the SHA-256 of everything that affects the response."""
+        if not self.cache_enabled:
+            return None
+        key_source = json.dumps({'kind': kind, 'model': self.model, **request}, sort_keys=True, default=str)
+        return self.cache_dir / f"{hashlib.sha256(key_source.encode('utf-8')).hexdigest()}.json"
+    
+    def _read_cache(self, cache_path: Optional[Path], parse: Callable[[str], Any] = None) -> Optional[Any]:
+        """Return the cached response content (run through parse, if given), or None on a miss."""
+        if cache_path is None or not cache_path.exists():
+            return None
         try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=input_text,
-                tools=[{"type": "web_search"}],
-                temperature=temperature
-            )
+            content = _json_loads(cache_path.read_bytes())['content']
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        if parse is not None:
+            try:
+                content = parse(content)
+            except ValueError as e:
+                # An entry the caller can no longer parse is dropped and the request made live again
+                logger.warning("openai_client.OpenAIClient._read_cache: Discarding unparseable cached response %s: %s", cache_path.name, e)
+                cache_path.unlink(missing_ok=True)
+                return None
+        
+        logger.debug("openai_client.OpenAIClient._read_cache: Using cached response %s", cache_path.name)
+        return content
+    
+    def _write_cache(self, cache_path: Optional[Path], content: str):
+        """Store response content; written to a temp file and renamed so readers never see a partial file."""
+        if cache_path is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+            if orjson is not None:
+                tmp_path.write_bytes(orjson.dumps({'content': content}))
+            else:
+                tmp_path.write_text(json.dumps({'content': content}), encoding='utf-8')
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("openai_client.OpenAIClient._write_cache: Could not cache response: %s", e)
+    
+    def _responses_request_params(self, input_text: str, temperature: float) -> dict:
+        """Build web-search Responses API parameters shared by the sync, async and batch calls."""
+        # No JSON mode here: it is not accepted together with the web_search tool, so callers
+        # parse the text with JSONProcessor instead
+        return {
+            "model": self.model,
+            "input": input_text,
+            "tools": [{"type": "web_search"}],
+            "temperature": temperature
+        }
+    
+    @retry(retry=retry_if_exception(_is_retryable), wait=wait_exponential_jitter(initial=1, max=60), stop=stop_after_attempt(4))
+    def responses_with_web_search(self, input_text: str, temperature: float = 0.1, parse: Callable[[str], Any] = None) -> Any:
+        """Make a Responses API call with web search capability; with parse, returns parse(text) and only caches text that parses."""
+        logger.debug("openai_client.OpenAIClient.responses_with_web_search: Making Responses API call with web search")
+        
+        cache_path = self._cache_path('responses_web_search', input=input_text, temperature=temperature)
+        cached = self._read_cache(cache_path, parse)
+        if cached is not None:
+            return cached
+        
+        try:
+            time.sleep(self._reserve_request_slot(self._estimate_tokens(input_text)))
+            response = self.client.responses.create(**self._responses_request_params(input_text, temperature))
             
             # Extract the final text response
             content = response.output[-1].content[0].text
-            print("openai_client.OpenAIClient.responses_with_web_search: API request successful")
-            return content
+            logger.debug("openai_client.OpenAIClient.responses_with_web_search: API request successful")
             
         except Exception as e:
-            print(f"openai_client.OpenAIClient.responses_with_web_search: API request failed: {e}")
+            logger.warning("openai_client.OpenAIClient.responses_with_web_search: API request failed: %s", e)
             raise
+        
+        # Parse before caching, so a truncated or malformed answer is never replayed
+        result = parse(content) if parse is not None else content
+        self._write_cache(cache_path, content)
+        return result
     
-    @retry(wait=wait_exponential(multiplier=1, min=4, max=60), stop=stop_after_attempt(3))
-    def chat_completion(self, messages: list, temperature: float = 0.3, response_format: dict = None) -> str:
-        """Make a chat completion API call with retry logic."""
-        print("openai_client.OpenAIClient.chat_completion: Making API request")
+    @retry(retry=retry_if_exception(_is_retryable), wait=wait_exponential_jitter(initial=1, max=60), stop=stop_after_attempt(4))
+    async def responses_with_web_search_async(self, input_text: str, temperature: float = 0.1, parse: Callable[[str], Any] = None) -> Any:
+        """Async variant of responses_with_web_search, for issuing several requests concurrently."""
+        logger.debug("openai_client.OpenAIClient.responses_with_web_search_async: Making async Responses API call with web search")
+        
+        cache_path = self._cache_path('responses_web_search', input=input_text, temperature=temperature)
+        cached = self._read_cache(cache_path, parse)
+        if cached is not None:
+            return cached
         
         try:
-            # Build request parameters
-            request_params = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature
-            }
+            await asyncio.sleep(self._reserve_request_slot(self._estimate_tokens(input_text)))
+            response = await self.async_client.responses.create(**self._responses_request_params(input_text, temperature))
             
-            # Add response_format if provided
-            if response_format:
-                request_params["response_format"] = response_format
-                print(f"openai_client.OpenAIClient.chat_completion: Using response_format: {response_format}")
+            # Extract the final text response
+            content = response.output[-1].content[0].text
+            logger.debug("openai_client.OpenAIClient.responses_with_web_search_async: API request successful")
             
+        except Exception as e:
+            logger.warning("openai_client.OpenAIClient.responses_with_web_search_async: API request failed: %s", e)
+            raise
+        
+        # Parse before caching, so a truncated or malformed answer is never replayed
+        result = parse(content) if parse is not None else content
+        self._write_cache(cache_path, content)
+        return result
+    
+    def responses_with_web_search_batch(self, input_texts: list, temperature: float = 0.1, poll_interval: float = 60.0, parse: Callable[[str], Any] = None) -> list:
+        """Run web-search Responses requests through the Batch API (half price, finishes within 24h); results keep input order, failures (including parse errors) are returned as exceptions."""
+        logger.debug("openai_client.OpenAIClient.responses_with_web_search_batch: Preparing %s requests", len(input_texts))
+        
+        # Cached answers are reused; only the misses are submitted
+        cache_paths = [
+            self._cache_path('responses_web_search', input=input_text, temperature=temperature)
+            for input_text in input_texts
+        ]
+        results = [self._read_cache(cache_path, parse) for cache_path in cache_paths]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        # One JSONL line per request; custom_id maps each result back to its input position
+        batch_lines = [
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": self._responses_request_params(input_texts[i], temperature)
+            })
+            for i in pending
+        ]
+        batch_file = self.client.files.create(file=('responses_batch.jsonl', '\n'.join(batch_lines).encode('utf-8')), purpose='batch')
+        batch = self.client.batches.create(input_file_id=batch_file.id, endpoint='/v1/responses', completion_window='24h')
+        logger.info("openai_client.OpenAIClient.responses_with_web_search_batch: Submitted batch %s with %s requests", batch.id, len(pending))
+        
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+            logger.debug("openai_client.OpenAIClient.responses_with_web_search_batch: Batch %s is %s", batch.id, batch.status)
+        
+        # Anything not reported in the output or error files failed with the batch itself
+        for i in pending:
+            results[i] = ValueError(f"openai_client.OpenAIClient.responses_with_web_search_batch: Batch {batch.id} ended with status {batch.status}")
+        
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                item = _json_loads(line)
+                i = int(item['custom_id'])
+                response = item.get('response') or {}
+                if response.get('status_code') == 200:
+                    # Same extraction as the direct call: the final output item's text
+                    content = response['body']['output'][-1]['content'][0]['text']
+                    try:
+                        results[i] = parse(content) if parse is not None else content
+                    except ValueError as e:
+                        results[i] = e
+                    else:
+                        self._write_cache(cache_paths[i], content)
+                else:
+                    error = item.get('error') or response.get('body', {}).get('error')
+                    results[i] = ValueError(f"openai_client.OpenAIClient.responses_with_web_search_batch: Request failed: {error}")
+        
+        failures = sum(isinstance(result, Exception) for result in results)
+        logger.info("openai_client.OpenAIClient.responses_with_web_search_batch: Completed %s/%s requests", len(results) - failures, len(results))
+        return results
+    
+    def _chat_request_params(self, messages: list, temperature: float, response_format: dict = None, max_tokens: int = None) -> dict:
+        """Build chat completion request parameters shared by the sync and async calls."""
+        request_params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        
+        # Add response_format if provided
+        if response_format:
+            request_params["response_format"] = response_format
+            logger.debug("openai_client.OpenAIClient._chat_request_params: Using response_format: %s", response_format)
+        
+        # A tight output cap bounds worst-case generation time for short, known-size replies
+        if max_tokens:
+            request_params["max_tokens"] = max_tokens
+        
+        return request_params
+    
+    @retry(retry=retry_if_exception(_is_retryable), wait=wait_exponential(multiplier=1, min=4, max=60), stop=stop_after_attempt(3))
+    def chat_completion(self, messages: list, temperature: float = 0.3, response_format: dict = None, max_tokens: int = None) -> str:
+        """Make a chat completion API call with retry logic."""
+        logger.debug("openai_client.OpenAIClient.chat_completion: Making API request")
+        
+        cache_path = self._cache_path('chat_completion', messages=messages, temperature=temperature, response_format=response_format, max_tokens=max_tokens)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
+        
+        try:
+            request_params = self._chat_request_params(messages, temperature, response_format, max_tokens)
+            time.sleep(self._reserve_request_slot(self._estimate_chat_tokens(messages, max_tokens)))
             response = self.client.chat.completions.create(**request_params)
             
             content = response.choices[0].message.content
-            print("openai_client.OpenAIClient.chat_completion: API request successful")
+            self._write_cache(cache_path, content)
+            logger.debug("openai_client.OpenAIClient.chat_completion: API request successful")
             return content
             
         except Exception as e:
-            print(f"openai_client.OpenAIClient.chat_completion: API request failed: {e}")
+            logger.warning("openai_client.OpenAIClient.chat_completion: API request failed: %s", e)
             raise
+    
+    @retry(retry=retry_if_exception(_is_retryable), wait=wait_exponential(multiplier=1, min=4, max=60), stop=stop_after_attempt(3))
+    async def chat_completion_async(self, messages: list, temperature: float = 0.3, response_format: dict = None, max_tokens: int = None) -> str:
+        """Async variant of chat_completion, for issuing several requests concurrently."""
+        logger.debug("openai_client.OpenAIClient.chat_completion_async: Making async API request")
+        
+        cache_path = self._cache_path('chat_completion', messages=messages, temperature=temperature, response_format=response_format, max_tokens=max_tokens)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
+        
+        try:
+            request_params = self._chat_request_params(messages, temperature, response_format, max_tokens)
+            await asyncio.sleep(self._reserve_request_slot(self._estimate_chat_tokens(messages, max_tokens)))
+            response = await self.async_client.chat.completions.create(**request_params)
+            
+            content = response.choices[0].message.content
+            self._write_cache(cache_path, content)
+            logger.debug("openai_client.OpenAIClient.chat_completion_async: API request successful")
+            return content
+            
+        except Exception as e:
+            logger.warning("openai_client.OpenAIClient.chat_completion_async: API request failed: %s", e)
+            raise
+    
+    def chat_completions_batch(self, messages_list: list, temperature: float = 0.3, response_format: dict = None, max_concurrency: int = 8, max_tokens: int = None) -> list:
+        """Run several chat completions concurrently; results keep input order, failures are returned as exceptions."""
+        logger.debug("openai_client.OpenAIClient.chat_completions_batch: Sending %s requests with up to %s in flight", len(messages_list), max_concurrency)
+        
+        async def complete_all():
+            semaphore = asyncio.Semaphore(max_concurrency)
+            
+            async def complete_one(messages):
+                async with semaphore:
+                    return await self.chat_completion_async(messages, temperature, response_format, max_tokens)
+            
+            return await asyncio.gather(*[complete_one(messages) for messages in messages_list], return_exceptions=True)
+        
+        results = run_async(complete_all())
+        
+        failures = sum(isinstance(result, Exception) for result in results)
+        logger.info("openai_client.OpenAIClient.chat_completions_batch: Completed %s/%s requests", len(results) - failures, len(results))
+        return results
 
 # File: ml/services/openai_client.py - Character count: 7247
\ No newline at end of file
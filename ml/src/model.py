@@ -3,39 +3,65 @@
 
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.layers import LSTM, GRU, Dense, Dropout
 
-def build_model(input_shape):
+# Recurrent settings that keep LSTM/GRU layers on the fused cuDNN kernel on GPU
+# (any other activation, recurrent dropout or unrolling falls back to the generic loop)
+CUDNN_RNN_KWARGS = dict(
+    activation='tanh',
+    recurrent_activation='sigmoid',
+    recurrent_dropout=0.0,
+    unroll=False,
+    use_bias=True
+)
+
+def build_model(input_shape, learning_rate=1e-3, steps_per_execution=1, cell='lstm'):
     """
     Builds and compiles the RNN model.
 
     Args:
         input_shape (tuple): The shape of the input data (timesteps, features).
+        learning_rate (float): Step size for the Adam optimizer.
+        steps_per_execution (int): Training steps run per call into the compiled graph.
+        cell (str): Recurrent layer type, 'lstm' or 'gru' (3 gates instead of 4, less recurrent compute).
 
     Returns:
         A compiled Keras model.
     """
-    print(f"model.build_model: Building model with input shape: {input_shape}")
+    if cell not in ('lstm', 'gru'):
+        raise ValueError(f"model.build_model: Unknown cell type '{cell}', expected 'lstm' or 'gru'")
+    print(f"model.build_model: Building {cell.upper()} model with input shape: {input_shape}")
+    
+    # GRU gets reset_after=True too, the variant cuDNN implements
+    rnn_layer = LSTM if cell == 'lstm' else GRU
+    rnn_kwargs = CUDNN_RNN_KWARGS if cell == 'lstm' else dict(CUDNN_RNN_KWARGS, reset_after=True)
     
     model = Sequential([
-        # First LSTM layer with dropout for regularization
-        LSTM(units=50, return_sequences=True, input_shape=input_shape),
+        # First recurrent layer; dropout stays between layers so the cuDNN kernel applies
+        rnn_layer(units=50, return_sequences=True, input_shape=input_shape, **rnn_kwargs),
         Dropout(0.2),
         
-        # Second LSTM layer
-        LSTM(units=50, return_sequences=False),
+        # Second recurrent layer
+        rnn_layer(units=50, return_sequences=False, **rnn_kwargs),
         Dropout(0.2),
         
         # A dense hidden layer
         Dense(units=25),
         
-        # The output layer: 1 neuron for the single predicted value
-        Dense(units=1) 
+        # The output layer: 1 neuron for the single predicted value.
+        # Kept in float32 so the regression output stays precise under mixed precision.
+        Dense(units=1, dtype='float32')
     ])
     
     # Compile the model
     # We use 'mean_squared_error' as the loss function because we are predicting a continuous value.
-    model.compile(optimizer='adam', loss='mean_squared_error')
+    # jit_compile has XLA fuse the LSTM gate matmuls, loss and optimizer update into a few kernels.
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='mean_squared_error',
+        jit_compile=True,
+        steps_per_execution=steps_per_execution
+    )
     
     print("model.build_model: Model built and compiled successfully.")
     model.summary()